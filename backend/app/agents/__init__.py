@@ -3,19 +3,23 @@ Agent Package
 Contains all debate agents with MCP support
 """
 
-from app.agents.base_agent import BaseAgent, AgentMessage
+from app.agents.base_agent import BaseAgent, AgentMessage, MessageSummary
 from app.agents.keyword_extractor import KeywordExtractorAgent
 from app.agents.argument_generator import ArgumentGeneratorAgent
 from app.agents.counter_argument import CounterArgumentAgent
 from app.agents.evaluation_agent import EvaluationAgent
 from app.agents.agent_coordinator import AgentCoordinator
+from app.agents.message_bus import MessageBus, BusOverloadedError
 
 __all__ = [
     'BaseAgent',
     'AgentMessage',
+    'MessageSummary',
     'KeywordExtractorAgent',
     'ArgumentGeneratorAgent',
     'CounterArgumentAgent',
     'EvaluationAgent',
-    'AgentCoordinator'
+    'AgentCoordinator',
+    'MessageBus',
+    'BusOverloadedError'
 ]
\ No newline at end of file
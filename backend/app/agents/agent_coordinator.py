@@ -3,15 +3,23 @@ Agent Coordinator
 Implements Model Context Protocol (MCP) for multi-agent coordination
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable, Awaitable, AsyncIterator
 from app.agents.base_agent import BaseAgent, AgentMessage
 from app.agents.keyword_extractor import KeywordExtractorAgent
 from app.agents.argument_generator import ArgumentGeneratorAgent
 from app.agents.counter_argument import CounterArgumentAgent
 from app.agents.evaluation_agent import EvaluationAgent
+from app.agents.history_compactor import HistoryCompactor
+from app.agents.feedback_scheduler import FeedbackScheduler
+from app.agents.pipeline import AgentPipeline, PipelineNode
+from app.agents.debate_locks import DebateLockManager
+from app.agents.message_bus import MessageBus, BusOverloadedError
+from app.config import settings
 from app.services.llm_service import LLMService
 from app.services.information_retrieval import InformationRetrieval
+from app.services.debate_store import DebateStateStore, TurnRecord, create_debate_store
 from datetime import datetime
+import asyncio
 import uuid
 import logging
 
@@ -23,10 +31,15 @@ class AgentCoordinator:
     Manages the debate workflow
     """
     
-    def __init__(self):
-        # Initialize services
-        self.llm_service = LLMService()
-        self.ir_service = InformationRetrieval()
+    def __init__(
+        self,
+        llm_service: Optional[LLMService] = None,
+        ir_service: Optional[InformationRetrieval] = None,
+        state_store: Optional[DebateStateStore] = None
+    ):
+        # Initialize services (shared ones are injected by the service container)
+        self.llm_service = llm_service or LLMService()
+        self.ir_service = ir_service or InformationRetrieval(llm_service=self.llm_service)
         
         # Initialize agents
         self.agents: Dict[str, BaseAgent] = {
@@ -36,133 +49,386 @@ class AgentCoordinator:
             "evaluation_agent": EvaluationAgent(self.llm_service)
         }
         
-        self.debate_history: Dict[str, List[Dict[str, Any]]] = {}
+        # All agent calls go through per-agent bounded queues and worker pools
+        self.message_bus = MessageBus(
+            self.agents,
+            queue_size=settings.AGENT_BUS_QUEUE_SIZE,
+            workers=settings.AGENT_BUS_WORKERS,
+            queue_sizes=settings.AGENT_BUS_QUEUE_SIZES,
+            worker_counts=settings.AGENT_BUS_WORKER_COUNTS,
+            enqueue_timeout=settings.AGENT_BUS_ENQUEUE_TIMEOUT
+        )
+        
+        # Debate history lives behind a pluggable store (bounded memory LRU or Redis)
+        self.state_store = state_store or create_debate_store()
+        
+        # Keeps counter-argument prompts bounded however long a debate runs
+        self.history_compactor = HistoryCompactor(
+            self.llm_service,
+            self.state_store,
+            verbatim_rounds=settings.HISTORY_VERBATIM_ROUNDS,
+            max_summary_chars=settings.HISTORY_SUMMARY_MAX_CHARS,
+            summary_max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS
+        )
+        
+        # Round feedback can be generated after the turn result is returned
+        self.feedback_scheduler = FeedbackScheduler(self._send, self.state_store)
+        
+        self.turn_pipeline = self._build_turn_pipeline()
+        
+        # Turns on one debate run strictly in order; different debates run in parallel
+        self.debate_locks = DebateLockManager(idle_ttl=settings.DEBATE_LOCK_IDLE_TTL)
+    
+    def _build_turn_pipeline(self) -> AgentPipeline:
+        """
+        Declare the debate-turn workflow as a DAG of agent calls
         
+        Nodes start as soon as their inputs exist, so keyword extraction,
+        weakness identification and human scoring overlap, and the AI
+        argument is scored while the human score finishes
+        """
+        return AgentPipeline([
+            PipelineNode(
+                name="keywords",
+                agent_id="keyword_extractor",
+                inputs=["user_argument"],
+                outputs={"keywords": "keywords"},
+                build_content=lambda ctx: {"text": ctx["user_argument"], "max_keywords": 10},
+                fallback={"keywords": []},
+                cacheable=True
+            ),
+            PipelineNode(
+                name="weaknesses",
+                agent_id="counter_argument",
+                inputs=["user_argument"],
+                outputs={"identified_weaknesses": "weaknesses"},
+                build_content=lambda ctx: {
+                    "task": "identify_weaknesses",
+                    "opponent_argument": ctx["user_argument"]
+                },
+                fallback={"weaknesses": []},
+                cacheable=True
+            ),
+            PipelineNode(
+                name="evidence",
+                agent_id="argument_generator",
+                inputs=["topic", "keywords"],
+                outputs={"evidence": "evidence"},
+                build_content=lambda ctx: {
+                    "task": "retrieve_evidence",
+                    "topic": ctx["topic"],
+                    "keywords": ctx["keywords"]
+                },
+                fallback={"evidence": []}
+            ),
+            PipelineNode(
+                name="counter_argument",
+                agent_id="counter_argument",
+                inputs=[
+                    "user_argument", "topic", "keywords", "weaknesses", "evidence",
+                    "context", "recent_rounds", "history_summary", "round_number", "token_callback"
+                ],
+                outputs={"counter_argument": "ai_argument"},
+                build_content=lambda ctx: {
+                    "opponent_argument": ctx["user_argument"],
+                    "topic": ctx["topic"],
+                    "keywords": ctx["keywords"],
+                    "weaknesses": ctx["weaknesses"],
+                    "evidence": ctx["evidence"] or [],
+                    "context": ctx["context"],
+                    "debate_history": ctx["recent_rounds"],
+                    "history_summary": ctx["history_summary"],
+                    "round_number": ctx["round_number"],
+                    "token_callback": ctx["token_callback"]
+                }
+            ),
+            PipelineNode(
+                name="human_scores",
+                agent_id="evaluation_agent",
+                inputs=["user_argument", "topic"],
+                outputs={"scores": "human_scores"},
+                build_content=lambda ctx: {
+                    "task": "score_argument",
+                    "argument": ctx["user_argument"],
+                    "participant": "human",
+                    "topic": ctx["topic"]
+                }
+            ),
+            PipelineNode(
+                name="ai_scores",
+                agent_id="evaluation_agent",
+                inputs=["ai_argument", "topic"],
+                outputs={"scores": "ai_scores"},
+                build_content=lambda ctx: {
+                    "task": "score_argument",
+                    "argument": ctx["ai_argument"],
+                    "participant": "ai",
+                    "topic": ctx["topic"]
+                }
+            ),
+            PipelineNode(
+                name="evaluation",
+                agent_id="evaluation_agent",
+                inputs=[
+                    "user_argument", "ai_argument", "topic", "round_number",
+                    "human_scores", "ai_scores", "defer_feedback"
+                ],
+                outputs={"*": "evaluation"},
+                build_content=lambda ctx: {
+                    "human_argument": ctx["user_argument"],
+                    "ai_argument": ctx["ai_argument"],
+                    "topic": ctx["topic"],
+                    "round": ctx["round_number"],
+                    "human_scores": ctx["human_scores"],
+                    "ai_scores": ctx["ai_scores"],
+                    "defer_feedback": ctx["defer_feedback"]
+                }
+            )
+        ])
+    
     async def process_debate_turn(
         self, 
         debate_id: str,
         user_argument: str,
-        context: Dict[str, Any]
+        context: Dict[str, Any],
+        event_callback: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
     ) -> Dict[str, Any]:
         """
         Process a complete debate turn through all agents
+        
+        When event_callback is given, the AI rebuttal is streamed to it as
+        incremental token events before the full turn result is returned
+        
+        Concurrent submissions to the same debate are queued and processed
+        one at a time, so each gets its own round number
+        """
+        async with self.debate_locks.hold(debate_id):
+            return await self._process_turn(debate_id, user_argument, context, event_callback)
+    
+    async def process_batch(
+        self,
+        items: List[Dict[str, Any]],
+        concurrency: int = 8
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
+        Process many debate turns, yielding each result as it completes
+        
+        items are {"debate_id", "argument", "context"} dicts. Turns of one
+        debate run in submission order; up to `concurrency` debates run at
+        once. A failed turn is reported in its result line and does not stop
+        the rest of the batch.
+        """
+        # Group by debate, keeping each debate's turns in submission order
+        by_debate: Dict[str, List[int]] = {}
+        for index, item in enumerate(items):
+            by_debate.setdefault(item["debate_id"], []).append(index)
+        
+        results: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        
+        async def run_debate(debate_id: str, indexes: List[int]) -> None:
+            async with semaphore:
+                for index in indexes:
+                    item = items[index]
+                    line: Dict[str, Any] = {"index": index, "debate_id": debate_id}
+                    try:
+                        line["result"] = await self.process_debate_turn(
+                            debate_id=debate_id,
+                            user_argument=item["argument"],
+                            context=item.get("context") or {}
+                        )
+                        line["status"] = "ok"
+                    except BusOverloadedError as e:
+                        line.update(status="overloaded", error=str(e))
+                    except Exception as e:
+                        logger.error(f"Batch turn {index} for {debate_id} failed: {e}")
+                        line.update(status="error", error=str(e))
+                    await results.put(line)
+        
+        tasks = [
+            asyncio.create_task(run_debate(debate_id, indexes))
+            for debate_id, indexes in by_debate.items()
+        ]
+        try:
+            for _ in range(len(items)):
+                yield await results.get()
+        finally:
+            # Stop outstanding work if the consumer goes away early
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def _process_turn(
+        self,
+        debate_id: str,
+        user_argument: str,
+        context: Dict[str, Any],
+        event_callback: Optional[Callable[[Dict[str, Any]], Awaitable[None]]]
+    ) -> Dict[str, Any]:
+        """Process one turn; the caller holds the debate's lock"""
         correlation_id = str(uuid.uuid4())
         topic = context.get("topic", "")
-
-        debate_history = self.debate_history.get(debate_id, [])
-        round_number = len(debate_history) + 1
+        
+        state = await self.state_store.load(debate_id)
+        round_number = await self.state_store.allocate_round(debate_id)
         
         logger.info(f"Processing debate turn {round_number} for {debate_id}")
         
-        # Step 1: Extract keywords from user argument
-        keyword_message = AgentMessage(
-            sender="coordinator",
-            receiver="keyword_extractor",
-            message_type="process_request",
-            content={"text": user_argument, "max_keywords": 10},
-            timestamp=datetime.now(),
-            correlation_id=correlation_id
-        )
+        token_callback = None
+        if event_callback is not None:
+            async def _emit_token(token: str) -> None:
+                await event_callback({
+                    "type": "token",
+                    "agent": "counter_argument",
+                    "debate_id": debate_id,
+                    "round": round_number,
+                    "token": token
+                })
+            token_callback = _emit_token
         
-        keyword_response = await self.agents["keyword_extractor"].receive_message(keyword_message)
-        keywords = keyword_response.content.get("keywords", [])
+        history_context = self.history_compactor.build_context(state)
         
-        # Step 2: Generate AI counter-argument with debate historry
-        counter_message = AgentMessage(
-            sender="coordinator",
-            receiver="counter_argument",
-            message_type="process_request",
-            content={
-                "opponent_argument": user_argument,
+        # Run the turn DAG: independent agents execute concurrently
+        pipeline_result = await self.turn_pipeline.run(
+            self._send,
+            initial={
+                "user_argument": user_argument,
                 "topic": topic,
-                "keywords": keywords,
                 "context": context,
-                "debate_history": debate_history,
-                "round_number": round_number
+                "round_number": round_number,
+                "recent_rounds": history_context["recent_rounds"],
+                "history_summary": history_context["history_summary"],
+                "token_callback": token_callback,
+                "defer_feedback": settings.EVALUATION_FEEDBACK_MODE.lower() == "deferred"
             },
-            timestamp=datetime.now(),
-            correlation_id=correlation_id
+            correlation_id=correlation_id,
+            skip=set(settings.PIPELINE_SKIP_NODES),
+            default_timeout=settings.PIPELINE_NODE_TIMEOUT
         )
         
-        counter_response = await self.agents["counter_argument"].receive_message(counter_message)
-        ai_argument = counter_response.content.get("counter_argument", "")
+        turn_context = pipeline_result.context
+        ai_argument = turn_context["ai_argument"] or ""
+        keywords = turn_context["keywords"] or []
+        evaluation = turn_context["evaluation"]
         
-        # Step 3: Evaluate both arguments
-        eval_message = AgentMessage(
-            sender="coordinator",
-            receiver="evaluation_agent",
-            message_type="process_request",
-            content={
-                "human_argument": user_argument,
-                "ai_argument": ai_argument,
-                "topic": topic,
-                "round": round_number
-            },
-            timestamp=datetime.now(),
-            correlation_id=correlation_id
+        # Store in history
+        turn_record = TurnRecord(
+            round_number=round_number,
+            human_argument=user_argument,
+            ai_argument=ai_argument,
+            keywords=tuple(keywords),
+            evaluation=evaluation,
+            timestamp=datetime.now().isoformat()
         )
         
-        eval_response = await self.agents["evaluation_agent"].receive_message(eval_message)
+        state = await self.state_store.append_round(debate_id, turn_record, topic=topic)
+        # The store fixes the final number; it differs from the provisional one
+        # only if another worker stored a turn of this debate meanwhile
+        round_number = turn_record.round_number
         
-        # Store in history
-        turn_data = {
-            "round_number": round_number,
-            "human_argument": user_argument,
-            "ai_argument": ai_argument,
-            "keywords": keywords,
-            "evaluation": eval_response.content,
-            "timestamp": datetime.now().isoformat()
-        }
+        # Refresh the rolling summary off the critical path
+        self.history_compactor.schedule_refresh(state)
         
-        if debate_id not in self.debate_history:
-            self.debate_history[debate_id] = []
-        self.debate_history[debate_id].append(turn_data)
+        # Likewise the feedback text; it is stored on the round and pushed when ready
+        if (evaluation or {}).get("feedback_status") == "pending":
+            self.feedback_scheduler.schedule(
+                debate_id,
+                round_number,
+                {
+                    "human_argument": user_argument,
+                    "ai_argument": ai_argument,
+                    "human_scores": evaluation.get("human_scores"),
+                    "ai_scores": evaluation.get("ai_scores")
+                },
+                correlation_id,
+                event_callback
+            )
         
         # Prepare response
         return {
             "ai_argument": ai_argument,
             "keywords": keywords,
-            "evaluation": eval_response.content,
+            "evaluation": evaluation,
             "round": round_number,
-            "total_rounds": len(self.debate_history[debate_id]),
+            "total_rounds": len(state.rounds),
             "debate_context": {
                 "previous_rounds": round_number - 1,
-                "cumulative_scores": self._calculate_cumulative_scores(debate_id)
+                "cumulative_scores": state.scores.cumulative_scores()
             },
-            "agent_status": self.get_all_agent_status()
+            "agent_status": self.get_all_agent_status(),
+            "pipeline": {
+                "timings_ms": pipeline_result.timings_ms,
+                "skipped": pipeline_result.skipped,
+                "timed_out": pipeline_result.timed_out,
+                "cached": pipeline_result.cached
+            }
         }
     
-    def _calculate_cumulative_scores(self, debate_id: str) -> Dict[str, float]:
-        """Calculate cumulative scores across all rounds"""
-        history = self.debate_history.get(debate_id, [])
-        
-        total_human = 0
-        total_ai = 0
+    async def _send(
+        self,
+        receiver: str,
+        content: Dict[str, Any],
+        correlation_id: str
+    ) -> Dict[str, Any]:
+        """
+        Send a process_request to an agent over MCP and return the response content
         
-        for round_data in history:
-            eval_data = round_data.get("evaluation", {})
-            human_scores = eval_data.get("human_scores", {})
-            ai_scores = eval_data.get("ai_scores", {})
-            
-            total_human += human_scores.get("total", 0)
-            total_ai += ai_scores.get("total", 0)
+        Raises BusOverloadedError when the agent's queue is full
+        """
+        message = AgentMessage(
+            sender="coordinator",
+            receiver=receiver,
+            message_type="process_request",
+            content=content,
+            timestamp=datetime.now(),
+            correlation_id=correlation_id
+        )
         
-        return {
-            "human_total": total_human,
-            "ai_total": total_ai,
-            "rounds": len(history),
-            "human_average": total_human / len(history) if history else 0,
-            "ai_average": total_ai / len(history) if history else 0
-        }
+        response = await self.message_bus.request(message)
+        return response.content if response else {}
+    
+    async def shutdown(self) -> None:
+        """Stop background work owned by the coordinator"""
+        await self.history_compactor.close()
+        await self.feedback_scheduler.close()
+        await self.message_bus.close()
+        await self.state_store.close()
     
     def get_all_agent_status(self) -> Dict[str, Any]:
-        """Get status of all agents"""
-        return {
-            agent_id: agent.get_status()
+        """Get status of all agents, including their message bus queues"""
+        queues = self.message_bus.get_stats()
+        status = {
+            agent_id: {**agent.get_status(), "queue": queues.get(agent_id)}
             for agent_id, agent in self.agents.items()
         }
+        status["evaluation_agent"]["deferred_feedback"] = self.feedback_scheduler.get_stats()
+        return status
+    
+    async def get_debate_history(self, debate_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Retrieve debate history; None if the debate is unknown"""
+        if not await self.state_store.exists(debate_id):
+            return None
+        return [record.to_dict() for record in await self.state_store.get_history(debate_id)]
+    
+    async def get_feedback(self, debate_id: str, round_number: int) -> Optional[Dict[str, Any]]:
+        """Feedback for one round: pending, ready or failed; None if the round is unknown"""
+        result = {"debate_id": debate_id, "round": round_number, "status": "pending", "feedback": None}
+        if self.feedback_scheduler.is_pending(debate_id, round_number):
+            return result
+        if not await self.state_store.exists(debate_id):
+            return None
+        
+        for record in reversed(await self.state_store.get_history(debate_id)):
+            if record.round_number == round_number:
+                evaluation = record.evaluation or {}
+                result["status"] = evaluation.get("feedback_status", "ready")
+                result["feedback"] = evaluation.get("feedback")
+                return result
+        return None
     
-    def get_debate_history(self, debate_id: str) -> List[Dict[str, Any]]:
-        """Retrieve debate history"""
-        return self.debate_history.get(debate_id, [])
+    async def get_scoreboard(self, debate_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieve the running scoreboard without loading the full history; None if the debate is unknown"""
+        if not await self.state_store.exists(debate_id):
+            return None
+        scores = await self.state_store.get_scores(debate_id)
+        return scores.scoreboard()
@@ -5,6 +5,7 @@ Generates arguments based on retrieved information and keywords
 
 from typing import Dict, Any, List
 from app.agents.base_agent import BaseAgent
+from app.agents.text_features import analyze_text
 from app.services.llm_service import LLMService
 from app.services.information_retrieval import InformationRetrieval
 import logging
@@ -41,6 +42,11 @@ class ArgumentGeneratorAgent(BaseAgent):
             max_results=5
         )
         
+        # Retrieval alone, e.g. to feed evidence into the counter-argument path
+        if input_data.get("task") == "retrieve_evidence":
+            self.state = "idle"
+            return {"evidence": retrieved_info, "agent": self.agent_id}
+        
         # Generate argument using LLM
         argument = await self._generate_argument_with_llm(
             topic=topic,
@@ -97,18 +103,19 @@ Argument:"""
         argument = await self.llm_service.generate(
             prompt=prompt,
             max_tokens=500,
-            temperature=0.7
+            temperature=0.7,
+            use_cache=False
         )
         
         return argument.strip()
     
     def _analyze_argument_structure(self, argument: str) -> Dict[str, Any]:
         """Analyze the structure of generated argument"""
-        sentences = [s.strip() for s in argument.split('.') if s.strip()]
+        features = analyze_text(argument)
         
         return {
-            "sentence_count": len(sentences),
-            "word_count": len(argument.split()),
-            "has_evidence": any(word in argument.lower() for word in ['research', 'study', 'data', 'evidence']),
-            "has_reasoning": any(word in argument.lower() for word in ['because', 'therefore', 'thus', 'hence'])
+            "sentence_count": features.sentence_count,
+            "word_count": features.word_count,
+            "has_evidence": features.has_any("structure_evidence"),
+            "has_reasoning": features.has_any("structure_reasoning")
         }
\ No newline at end of file
@@ -5,34 +5,98 @@ MCP = model context protocol
 """
 
 from abc import ABC, abstractmethod     #abc - abstract base classes
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Deque
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime
+from app.config import settings
+import sys
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class AgentMessage:
     """msg format for inter-agent communication - MCP"""
     sender: str
     receiver: str
-    message_type = str
+    message_type: str
     content: Dict [str, Any]
     timestamp: datetime
     correlation_id: str
 
+    def __post_init__(self):
+        # Agent ids and message types repeat on every message; share one copy
+        self.sender = sys.intern(self.sender)
+        self.receiver = sys.intern(self.receiver)
+        self.message_type = sys.intern(self.message_type)
+
+@dataclass(slots=True)
+class MessageSummary:
+    """What an agent keeps of a received message"""
+    # Never the content: it can hold a token callback bound to a WebSocket and
+    # the recent rounds of a debate
+    sender: str
+    message_type: str
+    correlation_id: str
+    timestamp: datetime
+
+    @classmethod
+    def of(cls, message: AgentMessage) -> "MessageSummary":
+        return cls(
+            sender=message.sender,
+            message_type=message.message_type,
+            correlation_id=message.correlation_id,
+            timestamp=message.timestamp
+        )
+
+class LatencyStats:
+    """Running latency figures for an agent, p95 taken over a recent window"""
+
+    def __init__(self, window: int = 256):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.last_ms = elapsed_ms
+        self._recent.append(elapsed_ms)
+
+    def to_dict(self) -> Dict[str, float]:
+        recent = sorted(self._recent)
+        p95 = recent[min(int(len(recent) * 0.95), len(recent) - 1)] if recent else 0.0
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p95_ms": round(p95, 2),
+            "max_ms": round(self.max_ms, 2),
+            "last_ms": round(self.last_ms, 2)
+        }
+
 class BaseAgent(ABC):
     """
     base class of all agents 
     to implent MCP for agent communication
     """
 
-    def __init__(self, agent_id: str, name: str):
+    def __init__(self, agent_id: str, name: str, history_size: Optional[int] = None):
         self.agent_id = agent_id
         self.name = name
         self.capabilities = []
-        self.message_history = []
+        # Only the most recent messages are kept; counters below are cumulative
+        self.message_history: Deque[MessageSummary] = deque(
+            maxlen=history_size if history_size is not None else settings.AGENT_MESSAGE_HISTORY_SIZE
+        )
+        self.messages_received = 0
+        self.messages_processed = 0
+        self.messages_failed = 0
+        self.latency = LatencyStats()
         self.state = "idle"
 
     @abstractmethod
@@ -46,13 +110,24 @@ class BaseAgent(ABC):
         """
         handle incoming messages from the other agents
         """
-        self.message_history.append(message)
+        self.message_history.append(MessageSummary.of(message))
+        self.messages_received += 1
         logger.info(f"{self.name} received message from {message.sender}")
 
         #process based on the message type
         if message.message_type == "process_request":
-            result = await self.process(message.content)
-            return self._create_response(message, result)
+            started = time.perf_counter()
+            try:
+                result = await self.process(message.content)
+            except Exception:
+                self.messages_failed += 1
+                self.state = "idle"
+                raise
+            finally:
+                self.latency.record((time.perf_counter() - started) * 1000)
+            
+            self.messages_processed += 1
+            return self.create_message(message, result)
         
         return None
     
@@ -75,6 +150,10 @@ class BaseAgent(ABC):
             "name": self.name,
             "state": self.state,
             "capabilities": self.capabilities,
-            "messages_processed": len(self.message_history)
+            "messages_received": self.messages_received,
+            "messages_processed": self.messages_processed,
+            "messages_failed": self.messages_failed,
+            "history_size": len(self.message_history),
+            "latency_ms": self.latency.to_dict()
         }
         
\ No newline at end of file
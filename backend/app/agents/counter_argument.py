@@ -3,8 +3,9 @@ Counter-Argument Generator Agent
 Generates counter-arguments by identifying weaknesses and providing rebuttals
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Callable, Awaitable
 from app.agents.base_agent import BaseAgent
+from app.agents.text_features import analyze_text
 from app.services.llm_service import LLMService
 import logging
 
@@ -33,10 +34,23 @@ class CounterArgumentAgent(BaseAgent):
         context = input_data.get("context", {})
         #new
         debate_history = input_data.get("debate_history", [])
-        round_number = input_data.get("round",1)
+        history_summary = input_data.get("history_summary", "")
+        evidence = input_data.get("evidence", [])
+        round_number = input_data.get("round_number", input_data.get("round", 1))
+        # Optional async callback receiving rebuttal tokens as they stream in
+        token_callback = input_data.get("token_callback")
         
-        # Identify weaknesses
-        weaknesses = await self._identify_weaknesses(opponent_argument)
+        # Weakness identification only needs the opponent's argument, so the
+        # coordinator may run it as its own task ahead of generation
+        if input_data.get("task") == "identify_weaknesses":
+            weaknesses = await self._identify_weaknesses(opponent_argument)
+            self.state = "idle"
+            return {"identified_weaknesses": weaknesses, "agent": self.agent_id}
+        
+        # Identify weaknesses (unless already identified)
+        weaknesses = input_data.get("weaknesses")
+        if weaknesses is None:
+            weaknesses = await self._identify_weaknesses(opponent_argument)
         
         # Generate counter-argument
         counter_arg = await self._generate_counter_with_llm(
@@ -46,7 +60,10 @@ class CounterArgumentAgent(BaseAgent):
             weaknesses=weaknesses,
             context=context,
             debate_history=debate_history,
-            round_number=round_number
+            history_summary=history_summary,
+            evidence=evidence,
+            round_number=round_number,
+            token_callback=token_callback
         )
         
         result = {
@@ -101,7 +118,10 @@ Weaknesses (list 2-3 key ones):"""
         weaknesses: List[str],
         context: Dict[str, Any],
         debate_history: List[Dict[str, Any]] = None,
-        round_number: int=1
+        history_summary: str = "",
+        evidence: List[Dict[str, Any]] = None,
+        round_number: int=1,
+        token_callback: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> str:
         """Generate counter-argument using LLM with debate history context"""
         
@@ -109,17 +129,26 @@ Weaknesses (list 2-3 key ones):"""
         
         #prompt = f"""You are in a debate. Generate a strong counter-argument to the opponent's position.
 
-        # Build context from debate history
+        # Build context from debate history: a summary of older rounds
+        # plus the most recent rounds verbatim, so the prompt stays bounded
         history_context = ""
+        if history_summary:
+            history_context += f"\n\nSummary of earlier rounds:\n{history_summary}\n"
         if debate_history and len(debate_history) > 0:
-            history_context = "\n\nPrevious rounds of this debate:\n"
+            history_context += "\n\nPrevious rounds of this debate:\n"
             for i, round_data in enumerate(debate_history, 1):
                 human_arg = round_data.get("human_argument", "")
                 ai_arg = round_data.get("ai_argument", "")
-                history_context += f"\nRound {i}:\n"
+                history_context += f"\nRound {round_data.get('round_number', i)}:\n"
                 history_context += f"Human: {human_arg[:200]}...\n"
                 history_context += f"You (AI): {ai_arg[:200]}...\n"
         
+        # Retrieved evidence, when the pipeline runs retrieval for rebuttals
+        if evidence:
+            history_context += "\n\nRelevant Evidence:\n" + "\n".join(
+                f"- {item.get('content', '')[:200]}" for item in evidence[:3]
+            )
+        
         # Craft round-specific instructions
         if round_number == 1:
             round_instruction = "This is the opening round. Present your main counter-argument with strong foundational points."
@@ -159,25 +188,41 @@ Your task: Generate a counter-argument that:
 
 Your Counter-Argument (4-6 sentences with specific details):"""
 
-        counter_arg = await self.llm_service.generate(
+        system_prompt = f"You are a skilled debater in round {round_number} debating: '{topic}'. Stay 100% focused on this exact topic. Build upon previous rounds and directly engage with the opponent's arguments about {topic}. Never switch to unrelated topics. Each round should introduce new angles about {topic}"
+        
+        if token_callback is None:
+            counter_arg = await self.llm_service.generate(
+                prompt=prompt,
+                max_tokens=700,
+                temperature=0.8,
+                system_prompt=system_prompt,
+                use_cache=False
+            )
+            return counter_arg.strip()
+        
+        # Stream the rebuttal so the client can render it as it is generated
+        tokens = []
+        async for token in self.llm_service.generate_stream(
             prompt=prompt,
             max_tokens=700,
             temperature=0.8,
-            system_prompt=f"You are a skilled debater in round {round_number} debating: '{topic}'. Stay 100% focused on this exact topic. Build upon previous rounds and directly engage with the opponent's arguments about {topic}. Never switch to unrelated topics. Each round should introduce new angles about {topic}"
-        )
+            system_prompt=system_prompt
+        ):
+            tokens.append(token)
+            await token_callback(token)
         
-        return counter_arg.strip()
+        return "".join(tokens).strip()
     
     def _determine_strategy(self, counter_arg: str) -> str:
         """Determine the strategy used in counter-argument"""
-        counter_lower = counter_arg.lower()
+        features = analyze_text(counter_arg)
         
         strategies = []
-        if any(word in counter_lower for word in ['however', 'although', 'while']):
+        if features.has_any("concession"):
             strategies.append("concession_refutation")
-        if any(word in counter_lower for word in ['evidence', 'research', 'data']):
+        if features.has_any("strategy_evidence"):
             strategies.append("evidence_based")
-        if any(word in counter_lower for word in ['logic', 'reasoning', 'fallacy']):
+        if features.has_any("logical_analysis"):
             strategies.append("logical_analysis")
             
         return ", ".join(strategies) if strategies else "direct_rebuttal"
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Debate Locks
+Per-debate async locks so turns on one debate are strictly ordered while
+different debates proceed in parallel
+"""
+
+from typing import Dict, AsyncIterator
+from contextlib import asynccontextmanager
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class _DebateLock:
+    __slots__ = ("lock", "users", "last_used")
+    
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+        self.last_used = time.monotonic()
+
+class DebateLockManager:
+    """
+    Hands out one lock per debate and evicts locks idle for longer than idle_ttl
+    """
+    
+    def __init__(self, idle_ttl: float = 300.0):
+        self.idle_ttl = idle_ttl
+        self._locks: Dict[str, _DebateLock] = {}
+        self._last_sweep = time.monotonic()
+    
+    @asynccontextmanager
+    async def hold(self, debate_id: str) -> AsyncIterator[None]:
+        """Serialize the enclosed block with every other holder for debate_id"""
+        entry = self._locks.get(debate_id)
+        if entry is None:
+            entry = self._locks[debate_id] = _DebateLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            entry.last_used = time.monotonic()
+            self._evict_idle()
+    
+    def is_busy(self, debate_id: str) -> bool:
+        """Whether a turn is running or queued for debate_id"""
+        entry = self._locks.get(debate_id)
+        return entry is not None and entry.users > 0
+    
+    def _evict_idle(self) -> None:
+        """Drop unused locks, sweeping at most once per idle_ttl / 10"""
+        now = time.monotonic()
+        if now - self._last_sweep < self.idle_ttl / 10:
+            return
+        self._last_sweep = now
+        
+        idle = [
+            debate_id for debate_id, entry in self._locks.items()
+            if entry.users == 0 and now - entry.last_used >= self.idle_ttl
+        ]
+        for debate_id in idle:
+            del self._locks[debate_id]
+        if idle:
+            logger.debug(f"Evicted {len(idle)} idle debate locks")
+    
+    def __len__(self) -> int:
+        return len(self._locks)
@@ -3,22 +3,81 @@ Evaluation Agent
 Evaluates arguments and provides scoring based on multiple criteria
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
+import asyncio
+import json
+import math
+import re
 from app.agents.base_agent import BaseAgent
+from app.agents.text_features import analyze_text
+from app.config import settings
 from app.services.llm_service import LLMService
+from app.services.persuasiveness_model import PersuasivenessModel, load_configured_model
 import logging
 
 logger = logging.getLogger(__name__)
 
+@dataclass(frozen=True)
+class HeuristicWeights:
+    """
+    Weights of the non-LLM criteria
+    
+    Shared with the batch rescorer (app.services.rescoring), which recomputes
+    stored rounds when these change
+    """
+    max_score: float = 10.0
+    # Logical coherence
+    coherence_base: float = 5.0
+    connector_weight: float = 0.5
+    contrast_weight: float = 0.3
+    contrast_cap: float = 1.5
+    # Evidence quality
+    evidence_base: float = 3.0
+    evidence_term_weight: float = 0.8
+    citation_bonus: float = 2.0
+    # Clarity
+    clarity_base: float = 5.0
+    ideal_sentence_min: float = 15
+    ideal_sentence_max: float = 25
+    ideal_sentence_bonus: float = 2.0
+    long_sentence_threshold: float = 35
+    long_sentence_penalty: float = 1.0
+    structure_min_sentences: int = 3
+    structure_bonus: float = 1.0
+    # Relevance
+    relevance_base: float = 5.0
+    topic_overlap_weight: float = 0.5
+    # A side must lead by more than this to win the round
+    winner_margin: float = 0.5
+    
+    @classmethod
+    def from_settings(cls) -> "HeuristicWeights":
+        """Defaults with any EVALUATION_HEURISTIC_WEIGHTS overrides applied"""
+        return cls(**settings.EVALUATION_HEURISTIC_WEIGHTS)
+
 class EvaluationAgent(BaseAgent):
     """
     Evaluates debate arguments and provides scores and feedback
     """
     
-    def __init__(self, llm_service: LLMService):
+    def __init__(
+        self,
+        llm_service: LLMService,
+        mode: Optional[str] = None,
+        weights: Optional[HeuristicWeights] = None,
+        persuasiveness_model: Optional[PersuasivenessModel] = None
+    ):
         super().__init__(agent_id="evaluation_agent", name="Evaluation Agent")
         self.capabilities = ["argument_evaluation", "scoring", "feedback_generation"]
         self.llm_service = llm_service
+        self.weights = weights or HeuristicWeights.from_settings()
+        # "combined": one JSON call scores both arguments' persuasiveness and writes feedback
+        # "separate": one call per persuasiveness score, then one for feedback
+        self.mode = (mode or settings.EVALUATION_MODE).lower()
+        # With PERSUASIVENESS_SCORER="local" a trained model replaces the persuasiveness LLM calls
+        self.persuasiveness_model = persuasiveness_model or load_configured_model()
+        self.persuasiveness_scorer = "local" if self.persuasiveness_model else "llm"
         self.criteria = [
             "logical_coherence",
             "evidence_quality",
@@ -26,7 +85,7 @@ class EvaluationAgent(BaseAgent):
             "clarity",
             "relevance"
         ]
-        
+    
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Evaluate arguments from both sides
@@ -34,17 +93,68 @@ class EvaluationAgent(BaseAgent):
         self.state = "processing"
         logger.info(f"{self.name} evaluating arguments")
         
+        # Scoring a single argument needs nothing from the other side,
+        # so the coordinator may request each one independently
+        if input_data.get("task") == "score_argument":
+            participant = input_data.get("participant", "human")
+            scores = await self._evaluate_argument(
+                input_data.get("argument", ""),
+                participant,
+                input_data.get("topic", ""),
+                # In combined mode persuasiveness is filled in by the round evaluation
+                include_persuasiveness=self.mode != "combined" or self.persuasiveness_model is not None
+            )
+            self.state = "idle"
+            return {"scores": scores, "participant": participant, "agent": self.agent_id}
+        
+        # Deferred feedback for a round that has already been scored
+        if input_data.get("task") == "generate_feedback":
+            feedback = await self._generate_feedback(
+                input_data.get("human_argument", ""),
+                input_data.get("ai_argument", ""),
+                input_data.get("human_scores") or {},
+                input_data.get("ai_scores") or {}
+            )
+            self.state = "idle"
+            return {"feedback": feedback, "round": input_data.get("round"), "agent": self.agent_id}
+        
         human_arg = input_data.get("human_argument", "")
         ai_arg = input_data.get("ai_argument", "")
         topic = input_data.get("topic", "")
         round_number = input_data.get("round", 1)
+        # Deferred feedback is generated after the turn returns (see generate_feedback)
+        defer_feedback = bool(input_data.get("defer_feedback"))
+        
+        # Evaluate both arguments concurrently (reusing scores computed ahead of time)
+        combined = self.mode == "combined" and self.persuasiveness_model is None
+        human_scores = input_data.get("human_scores")
+        ai_scores = input_data.get("ai_scores")
+        human_scores, ai_scores = await asyncio.gather(
+            self._scores_or_evaluate(human_scores, human_arg, "human", topic, not combined),
+            self._scores_or_evaluate(ai_scores, ai_arg, "ai", topic, not combined)
+        )
         
-        # Evaluate both arguments
-        human_scores = await self._evaluate_argument(human_arg, "human", topic)
-        ai_scores = await self._evaluate_argument(ai_arg, "ai", topic)
+        # Fast path: both persuasiveness scores (and the feedback) from one structured call
+        feedback = None
+        evaluation_mode = "local" if self.persuasiveness_model else "separate"
+        if combined:
+            judged = await self._judge_round(human_arg, ai_arg, topic, with_feedback=not defer_feedback)
+            if judged is not None:
+                human_scores.setdefault("persuasiveness", judged["human_persuasiveness"])
+                ai_scores.setdefault("persuasiveness", judged["ai_persuasiveness"])
+                feedback = judged.get("feedback")
+                evaluation_mode = "combined"
+            else:
+                logger.warning("Combined evaluation could not be parsed, using per-call scoring")
+                evaluation_mode = "combined_fallback"
         
-        # Generate comparative feedback
-        feedback = await self._generate_feedback(human_arg, ai_arg, human_scores, ai_scores)
+        # Per-call path: score whatever is still missing, then generate feedback
+        await asyncio.gather(
+            self._complete_scores(human_scores, human_arg, topic),
+            self._complete_scores(ai_scores, ai_arg, topic)
+        )
+        if feedback is None and not defer_feedback:
+            feedback = await self._generate_feedback(human_arg, ai_arg, human_scores, ai_scores)
         
         # Determine round winner
         winner = self._determine_winner(human_scores, ai_scores)
@@ -53,16 +163,49 @@ class EvaluationAgent(BaseAgent):
             "human_scores": human_scores,
             "ai_scores": ai_scores,
             "feedback": feedback,
+            "feedback_status": "pending" if defer_feedback else "ready",
             "round_winner": winner,
             "round": round_number,
+            "evaluation_mode": evaluation_mode,
+            "persuasiveness_scorer": self.persuasiveness_scorer,
             "agent": self.agent_id
         }
         
         self.state = "idle"
         return result
     
-    async def _evaluate_argument(self, argument: str, participant: str, topic: str) -> Dict[str, float]:
-        """Evaluate a single argument across multiple criteria"""
+    async def _scores_or_evaluate(
+        self,
+        scores: Optional[Dict[str, float]],
+        argument: str,
+        participant: str,
+        topic: str,
+        include_persuasiveness: bool = True
+    ) -> Dict[str, float]:
+        """Return (a copy of) precomputed scores, or evaluate the argument"""
+        if scores:
+            return dict(scores)
+        return await self._evaluate_argument(argument, participant, topic, include_persuasiveness)
+    
+    async def _complete_scores(self, scores: Dict[str, float], argument: str, topic: str) -> None:
+        """Fill in a missing persuasiveness score and (re)compute the total"""
+        if "persuasiveness" not in scores:
+            scores["persuasiveness"] = await self._score_persuasiveness(argument, topic)
+        scores["total"] = sum(scores[criterion] for criterion in self.criteria) / len(self.criteria)
+    
+    async def _evaluate_argument(
+        self,
+        argument: str,
+        participant: str,
+        topic: str,
+        include_persuasiveness: bool = True
+    ) -> Dict[str, float]:
+        """
+        Evaluate a single argument across multiple criteria
+        
+        Without include_persuasiveness only the heuristic criteria are scored
+        and no total is computed; _complete_scores finishes the job
+        """
         
         scores = {}
         
@@ -73,7 +216,8 @@ class EvaluationAgent(BaseAgent):
         scores['evidence_quality'] = self._score_evidence(argument)
         
         # Persuasiveness
-        scores['persuasiveness'] = await self._score_persuasiveness(argument, topic)
+        if include_persuasiveness:
+            scores['persuasiveness'] = await self._score_persuasiveness(argument, topic)
         
         # Clarity
         scores['clarity'] = self._score_clarity(argument)
@@ -82,39 +226,43 @@ class EvaluationAgent(BaseAgent):
         scores['relevance'] = self._score_relevance(argument, topic)
         
         # Calculate total
-        scores['total'] = sum(scores.values()) / len(self.criteria)
+        if include_persuasiveness:
+            scores['total'] = sum(scores.values()) / len(self.criteria)
         
         return scores
     
     def _score_logical_coherence(self, argument: str) -> float:
         """Score logical coherence (0-10)"""
-        score = 5.0
+        features = analyze_text(argument)
+        weights = self.weights
+        score = weights.coherence_base
         
         # Check for logical connectors
-        logical_words = ['therefore', 'thus', 'hence', 'because', 'since', 'consequently']
-        score += sum(1 for word in logical_words if word in argument.lower()) * 0.5
+        score += features.count("logical_connectors") * weights.connector_weight
         
         # Check for contradictions
-        contradiction_words = ['but', 'however', 'although']
-        score += min(sum(1 for word in contradiction_words if word in argument.lower()) * 0.3, 1.5)
+        score += min(features.count("contrast") * weights.contrast_weight, weights.contrast_cap)
         
-        return min(score, 10.0)
+        return min(score, weights.max_score)
     
     def _score_evidence(self, argument: str) -> float:
         """Score evidence quality (0-10)"""
-        score = 3.0
+        features = analyze_text(argument)
+        weights = self.weights
+        score = weights.evidence_base
         
-        evidence_words = ['research', 'study', 'data', 'evidence', 'statistics', 'findings', 'survey']
-        score += sum(1 for word in evidence_words if word in argument.lower()) * 0.8
+        score += features.count("evidence") * weights.evidence_term_weight
         
         # Check for citations or references
-        if any(marker in argument for marker in ['(', 'according to', 'states that']):
-            score += 2.0
-            
-        return min(score, 10.0)
+        if features.has_citation:
+            score += weights.citation_bonus
+        
+        return min(score, weights.max_score)
     
     async def _score_persuasiveness(self, argument: str, topic: str) -> float:
-        """Score persuasiveness using LLM (0-10)"""
+        """Score persuasiveness using LLM, or the local model when configured (0-10)"""
+        if self.persuasiveness_model is not None:
+            return self.persuasiveness_model.predict(argument, topic)
         
         prompt = f"""Rate the persuasiveness of this argument on a scale of 0-10.
 
@@ -142,34 +290,35 @@ Score (0-10):"""
     
     def _score_clarity(self, argument: str) -> float:
         """Score clarity (0-10)"""
-        score = 5.0
+        features = analyze_text(argument)
+        weights = self.weights
+        score = weights.clarity_base
         
         # Check sentence length
-        sentences = [s for s in argument.split('.') if s.strip()]
-        avg_sentence_length = sum(len(s.split()) for s in sentences) / max(len(sentences), 1)
-        
-        if 15 <= avg_sentence_length <= 25:
-            score += 2.0
-        elif avg_sentence_length > 35:
-            score -= 1.0
-            
+        avg_sentence_length = features.avg_sentence_length
+        
+        if weights.ideal_sentence_min <= avg_sentence_length <= weights.ideal_sentence_max:
+            score += weights.ideal_sentence_bonus
+        elif avg_sentence_length > weights.long_sentence_threshold:
+            score -= weights.long_sentence_penalty
+        
         # Check for clear structure
-        if len(sentences) >= 3:
-            score += 1.0
-            
-        return min(score, 10.0)
+        if features.sentence_count >= weights.structure_min_sentences:
+            score += weights.structure_bonus
+        
+        return min(score, weights.max_score)
     
     def _score_relevance(self, argument: str, topic: str) -> float:
         """Score relevance to topic (0-10)"""
-        score = 5.0
+        weights = self.weights
+        score = weights.relevance_base
         
         topic_words = set(topic.lower().split())
-        argument_words = set(argument.lower().split())
         
-        overlap = len(topic_words & argument_words)
-        score += overlap * 0.5
+        overlap = len(topic_words & analyze_text(argument).words)
+        score += overlap * weights.topic_overlap_weight
         
-        return min(score, 10.0)
+        return min(score, weights.max_score)
     
     async def _generate_feedback(
         self, 
@@ -200,11 +349,99 @@ Provide 2-3 sentences of feedback highlighting strengths and areas for improveme
         
         return feedback.strip()
     
+    async def _judge_round(
+        self,
+        human_arg: str,
+        ai_arg: str,
+        topic: str,
+        with_feedback: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Score both arguments' persuasiveness (and write feedback) in one LLM call"""
+        
+        if with_feedback:
+            instructions = " Then write 2-3 sentences of constructive feedback highlighting strengths and areas for improvement for both sides."
+            shape = '{"human_persuasiveness": <number 0-10>, "ai_persuasiveness": <number 0-10>, "feedback": "<2-3 sentences>"}'
+        else:
+            instructions = ""
+            shape = '{"human_persuasiveness": <number 0-10>, "ai_persuasiveness": <number 0-10>}'
+        
+        prompt = f"""You are judging one round of a formal debate.
+
+Topic: {topic}
+
+Human Argument:
+{human_arg}
+
+AI Argument:
+{ai_arg}
+
+Rate the persuasiveness of each argument on a scale of 0-10, considering emotional appeal, logical strength, use of examples and overall impact.{instructions}
+
+Respond with a single JSON object and nothing else:
+{shape}"""
+
+        response = await self.llm_service.generate(
+            prompt=prompt,
+            max_tokens=250 if with_feedback else 40,
+            temperature=0.3,
+            json_mode=True
+        )
+        return self._parse_judgement(response, require_feedback=with_feedback)
+    
+    @staticmethod
+    def _parse_judgement(response: str, require_feedback: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Extract and validate the combined judgement
+        
+        Tolerates code fences and surrounding prose; returns None unless both
+        scores are numeric and (when required) the feedback is a non-empty string
+        """
+        if not response:
+            return None
+        
+        start, end = response.find("{"), response.rfind("}")
+        if start == -1 or end <= start:
+            return None
+        try:
+            data = json.loads(response[start:end + 1])
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        
+        # Also accept {"persuasiveness": {"human": .., "ai": ..}}
+        nested = data.get("persuasiveness") if isinstance(data.get("persuasiveness"), dict) else {}
+        
+        judged: Dict[str, Any] = {}
+        for participant in ("human", "ai"):
+            value = data.get(f"{participant}_persuasiveness", nested.get(participant))
+            if isinstance(value, str):
+                match = re.search(r"-?\d+(?:\.\d+)?", value)
+                value = match.group() if match else None
+            try:
+                score = float(value)
+            except (TypeError, ValueError):
+                return None
+            if not math.isfinite(score):
+                return None
+            judged[f"{participant}_persuasiveness"] = min(max(score, 0.0), 10.0)
+        
+        if not require_feedback:
+            return judged
+        
+        feedback = data.get("feedback")
+        if not isinstance(feedback, str) or not feedback.strip():
+            return None
+        judged["feedback"] = feedback.strip()
+        
+        return judged
+    
     def _determine_winner(self, human_scores: Dict[str, float], ai_scores: Dict[str, float]) -> str:
         """Determine round winner"""
-        if human_scores['total'] > ai_scores['total'] + 0.5:
+        margin = self.weights.winner_margin
+        if human_scores['total'] > ai_scores['total'] + margin:
             return "human"
-        elif ai_scores['total'] > human_scores['total'] + 0.5:
+        elif ai_scores['total'] > human_scores['total'] + margin:
             return "ai"
         else:
             return "tie"
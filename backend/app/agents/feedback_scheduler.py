@@ -0,0 +1,113 @@
+"""
+Feedback Scheduler
+Generates round feedback off the critical path of a turn. Work is keyed by
+(debate_id, round); finished feedback is written back to the stored round
+and pushed to the turn's event callback (the WebSocket) when there is one
+"""
+
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+import asyncio
+from app.services.debate_store import DebateStateStore
+import logging
+
+logger = logging.getLogger(__name__)
+
+SendFn = Callable[[str, Dict[str, Any], str], Awaitable[Dict[str, Any]]]
+EventCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class FeedbackScheduler:
+    """
+    Runs deferred feedback generation in the background
+    
+    Feedback is requested from the evaluation agent through the same send
+    function the turn pipeline uses, so it goes through the message bus
+    """
+    
+    def __init__(self, send: SendFn, state_store: DebateStateStore):
+        self._send = send
+        self.state_store = state_store
+        self._tasks: Dict[Tuple[str, int], asyncio.Task] = {}
+        self.completed = 0
+        self.failed = 0
+    
+    def schedule(
+        self,
+        debate_id: str,
+        round_number: int,
+        content: Dict[str, Any],
+        correlation_id: str,
+        event_callback: Optional[EventCallback] = None
+    ) -> None:
+        """Start generating feedback for a round unless it is already running"""
+        key = (debate_id, round_number)
+        running = self._tasks.get(key)
+        if running is not None and not running.done():
+            return
+        
+        self._tasks[key] = asyncio.create_task(
+            self._run(key, content, correlation_id, event_callback)
+        )
+    
+    def is_pending(self, debate_id: str, round_number: int) -> bool:
+        task = self._tasks.get((debate_id, round_number))
+        return task is not None and not task.done()
+    
+    async def _run(
+        self,
+        key: Tuple[str, int],
+        content: Dict[str, Any],
+        correlation_id: str,
+        event_callback: Optional[EventCallback]
+    ) -> None:
+        debate_id, round_number = key
+        try:
+            try:
+                response = await self._send(
+                    "evaluation_agent",
+                    {"task": "generate_feedback", "round": round_number, **content},
+                    correlation_id
+                )
+                feedback = response.get("feedback") or None
+            except Exception as e:
+                logger.error(f"Feedback generation failed for {debate_id} round {round_number}: {e}")
+                feedback = None
+            
+            status = "ready" if feedback else "failed"
+            if feedback:
+                self.completed += 1
+            else:
+                self.failed += 1
+            
+            await self.state_store.save_feedback(debate_id, round_number, feedback, status)
+            
+            if event_callback is not None:
+                try:
+                    await event_callback({
+                        "type": "feedback",
+                        "debate_id": debate_id,
+                        "round": round_number,
+                        "status": status,
+                        "feedback": feedback
+                    })
+                except Exception as e:
+                    # The client may have disconnected; the feedback endpoint still has it
+                    logger.debug(f"Could not push feedback for {debate_id} round {round_number}: {e}")
+        except Exception as e:
+            logger.error(f"Could not store feedback for {debate_id} round {round_number}: {e}")
+        finally:
+            self._tasks.pop(key, None)
+    
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "pending": sum(1 for task in self._tasks.values() if not task.done()),
+            "completed": self.completed,
+            "failed": self.failed
+        }
+    
+    async def close(self) -> None:
+        """Cancel feedback still being generated"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
@@ -0,0 +1,131 @@
+"""
+History Compactor
+Keeps counter-argument prompts constant-size by pairing the last few rounds
+verbatim with an incrementally updated summary of everything older
+"""
+
+from typing import Dict, Any, List
+import asyncio
+from app.services.llm_service import LLMService
+from app.services.debate_store import DebateState, DebateStateStore
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HistoryCompactor:
+    """
+    Maintains per-debate rolling summaries, refreshed in the background
+    Summaries are kept on the debate state so they survive eviction
+    """
+    
+    def __init__(
+        self,
+        llm_service: LLMService,
+        state_store: DebateStateStore,
+        verbatim_rounds: int = 3,
+        max_summary_chars: int = 1200,
+        summary_max_tokens: int = 200
+    ):
+        self.llm_service = llm_service
+        self.state_store = state_store
+        self.verbatim_rounds = max(verbatim_rounds, 0)
+        self.max_summary_chars = max_summary_chars
+        self.summary_max_tokens = summary_max_tokens
+        self._tasks: Dict[str, asyncio.Task] = {}
+    
+    def build_context(self, state: DebateState) -> Dict[str, Any]:
+        """
+        Return the bounded history for the next prompt:
+        the summary of older rounds plus the last N rounds verbatim
+        """
+        history = state.rounds
+        cutoff = max(len(history) - self.verbatim_rounds, 0)
+        summary_text = state.summary
+        
+        # Rounds that left the window but the background refresh has not folded in yet
+        lagging = history[state.summarized_through:cutoff]
+        if lagging:
+            lagging_text = " ".join(
+                f"Round {round_data.get('round_number', '?')}: "
+                f"Human argued {round_data.get('human_argument', '')[:120]}; "
+                f"AI replied {round_data.get('ai_argument', '')[:120]}."
+                for round_data in lagging
+            )
+            summary_text = f"{summary_text} {lagging_text}".strip()
+        
+        if len(summary_text) > self.max_summary_chars:
+            summary_text = "..." + summary_text[-(self.max_summary_chars - 3):]
+        
+        return {
+            "history_summary": summary_text,
+            "recent_rounds": history[cutoff:]
+        }
+    
+    def schedule_refresh(self, state: DebateState) -> None:
+        """Fold rounds that left the verbatim window into the summary, in the background"""
+        debate_id = state.debate_id
+        if len(state.rounds) - self.verbatim_rounds <= state.summarized_through:
+            return
+        
+        running = self._tasks.get(debate_id)
+        if running is not None and not running.done():
+            # The running refresh re-checks the window before it finishes
+            return
+        
+        self._tasks[debate_id] = asyncio.create_task(self._refresh(debate_id))
+    
+    async def _refresh(self, debate_id: str) -> None:
+        try:
+            while True:
+                state = await self.state_store.load(debate_id)
+                cutoff = len(state.rounds) - self.verbatim_rounds
+                if cutoff <= state.summarized_through:
+                    break
+                
+                new_rounds = state.rounds[state.summarized_through:cutoff]
+                text = await self._summarize(state.summary, new_rounds)
+                await self.state_store.save_summary(
+                    debate_id,
+                    text[:self.max_summary_chars],
+                    cutoff
+                )
+        except Exception as e:
+            logger.error(f"History summary refresh failed for {debate_id}: {e}")
+        finally:
+            self._tasks.pop(debate_id, None)
+    
+    async def _summarize(self, previous_summary: str, rounds: List[Dict[str, Any]]) -> str:
+        """Ask the LLM to fold new rounds into the existing summary"""
+        rounds_text = "\n".join(
+            f"Round {round_data.get('round_number', '?')}:\n"
+            f"Human: {round_data.get('human_argument', '')}\n"
+            f"AI: {round_data.get('ai_argument', '')}"
+            for round_data in rounds
+        )
+        
+        prompt = f"""Update the running summary of a debate with the new rounds below.
+
+Existing summary:
+{previous_summary or "(none yet)"}
+
+New rounds:
+{rounds_text}
+
+Write an updated summary of at most 120 words that captures each side's main claims, the evidence used, and which points remain unresolved.
+
+Updated summary:"""
+
+        response = await self.llm_service.generate(
+            prompt=prompt,
+            max_tokens=self.summary_max_tokens,
+            temperature=0.3
+        )
+        return response.strip()
+    
+    async def close(self) -> None:
+        """Cancel any refreshes still running"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
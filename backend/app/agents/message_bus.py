@@ -0,0 +1,192 @@
+"""
+Message Bus
+In-process MCP transport: every agent gets a bounded queue drained by its
+own pool of workers, so per-agent concurrency is capped and overload is
+rejected at the door instead of piling up behind the LLM
+"""
+
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
+import asyncio
+import time
+from app.agents.base_agent import BaseAgent, AgentMessage
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BusOverloadedError(RuntimeError):
+    """Raised when an agent's queue is full"""
+    
+    def __init__(self, agent_id: str, queue_size: int):
+        super().__init__(f"Agent {agent_id} is overloaded ({queue_size} messages queued)")
+        self.agent_id = agent_id
+        self.queue_size = queue_size
+
+@dataclass(slots=True)
+class _Envelope:
+    message: AgentMessage
+    future: asyncio.Future
+    enqueued_at: float
+
+class _AgentChannel:
+    """Queue, workers and counters for one agent"""
+    
+    def __init__(self, agent: BaseAgent, queue_size: int, workers: int):
+        self.agent = agent
+        self.queue: "asyncio.Queue[_Envelope]" = asyncio.Queue(maxsize=max(queue_size, 1))
+        self.worker_count = max(workers, 1)
+        self.workers: List[asyncio.Task] = []
+        self.busy = 0
+        self.peak_depth = 0
+        self.enqueued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.dropped = 0  # requests abandoned by the caller before a worker got to them
+        self.total_wait_ms = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        started = self.completed + self.failed
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "peak_depth": self.peak_depth,
+            "workers": self.worker_count,
+            "busy_workers": self.busy,
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "avg_wait_ms": round(self.total_wait_ms / started, 2) if started else 0.0
+        }
+
+class MessageBus:
+    """
+    Routes AgentMessages to agents through per-agent bounded queues
+    
+    request() enqueues a message and resolves with the agent's response
+    (matched by correlation_id). If the queue stays full for enqueue_timeout
+    seconds the request fails with BusOverloadedError.
+    """
+    
+    def __init__(
+        self,
+        agents: Dict[str, BaseAgent],
+        queue_size: int = 100,
+        workers: int = 4,
+        queue_sizes: Optional[Dict[str, int]] = None,
+        worker_counts: Optional[Dict[str, int]] = None,
+        enqueue_timeout: float = 0.0
+    ):
+        self.agents = agents
+        self.queue_size = queue_size
+        self.workers = workers
+        self.queue_sizes = queue_sizes or {}
+        self.worker_counts = worker_counts or {}
+        self.enqueue_timeout = enqueue_timeout
+        self._channels: Dict[str, _AgentChannel] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _channel(self, agent_id: str) -> _AgentChannel:
+        """Create an agent's queue and workers on first use (needs a running loop)"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Queues and workers belong to one loop; start fresh on a new one
+            self._channels.clear()
+            self._loop = loop
+        
+        channel = self._channels.get(agent_id)
+        if channel is None:
+            if agent_id not in self.agents:
+                raise KeyError(f"Unknown agent: {agent_id}")
+            channel = _AgentChannel(
+                self.agents[agent_id],
+                self.queue_sizes.get(agent_id, self.queue_size),
+                self.worker_counts.get(agent_id, self.workers)
+            )
+            channel.workers = [
+                asyncio.create_task(self._worker(channel), name=f"bus-{agent_id}-{i}")
+                for i in range(channel.worker_count)
+            ]
+            self._channels[agent_id] = channel
+        return channel
+    
+    async def request(self, message: AgentMessage) -> Optional[AgentMessage]:
+        """Deliver a message to its receiver and wait for the response"""
+        channel = self._channel(message.receiver)
+        envelope = _Envelope(
+            message=message,
+            future=asyncio.get_running_loop().create_future(),
+            enqueued_at=time.perf_counter()
+        )
+        
+        try:
+            if self.enqueue_timeout > 0:
+                await asyncio.wait_for(channel.queue.put(envelope), self.enqueue_timeout)
+            else:
+                channel.queue.put_nowait(envelope)
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            channel.rejected += 1
+            logger.warning(f"Message bus rejected a message for {message.receiver}: queue full")
+            raise BusOverloadedError(message.receiver, channel.queue.qsize())
+        
+        channel.enqueued += 1
+        channel.peak_depth = max(channel.peak_depth, channel.queue.qsize())
+        
+        try:
+            return await envelope.future
+        except asyncio.CancelledError:
+            # The worker skips envelopes whose caller has gone away
+            envelope.future.cancel()
+            raise
+    
+    async def _worker(self, channel: _AgentChannel) -> None:
+        while True:
+            envelope = await channel.queue.get()
+            try:
+                if envelope.future.done():
+                    channel.dropped += 1
+                    continue
+                
+                channel.total_wait_ms += (time.perf_counter() - envelope.enqueued_at) * 1000
+                channel.busy += 1
+                try:
+                    response = await channel.agent.receive_message(envelope.message)
+                except Exception as e:
+                    channel.failed += 1
+                    if not envelope.future.done():
+                        envelope.future.set_exception(e)
+                else:
+                    channel.completed += 1
+                    if response is not None and response.correlation_id != envelope.message.correlation_id:
+                        logger.warning(f"{channel.agent.agent_id} answered with a mismatched correlation_id")
+                    if not envelope.future.done():
+                        envelope.future.set_result(response)
+                finally:
+                    channel.busy -= 1
+            finally:
+                channel.queue.task_done()
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth and throughput counters per agent"""
+        return {agent_id: channel.to_dict() for agent_id, channel in self._channels.items()}
+    
+    async def close(self) -> None:
+        """Stop the workers and fail anything still queued"""
+        if self._loop is not asyncio.get_running_loop():
+            # Workers from another (finished) loop cannot be awaited here
+            self._channels.clear()
+            return
+        
+        tasks = [task for channel in self._channels.values() for task in channel.workers]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        for channel in self._channels.values():
+            while not channel.queue.empty():
+                envelope = channel.queue.get_nowait()
+                if not envelope.future.done():
+                    envelope.future.set_exception(RuntimeError("Message bus closed"))
+        self._channels.clear()
@@ -0,0 +1,184 @@
+"""
+Agent Pipeline
+Small DAG executor for the MCP turn workflow: each node names the agent it
+calls, the context keys it reads and the keys it produces, and the pipeline
+runs every node as soon as its inputs are ready
+"""
+
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Set
+from dataclasses import dataclass, field
+from collections import OrderedDict
+import asyncio
+import json
+import time
+from app.utils.helpers import hash_text
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (receiver agent_id, content, correlation_id) -> response content
+SendFunc = Callable[[str, Dict[str, Any], str], Awaitable[Dict[str, Any]]]
+
+@dataclass
+class PipelineNode:
+    """
+    One agent call in the pipeline
+    
+    outputs maps response fields to context keys; the field "*" stores the
+    whole response. fallback supplies outputs when the node is skipped
+    (outputs default to None), times out or fails; without a fallback a
+    timeout or failure fails the whole run.
+    """
+    name: str
+    agent_id: str
+    inputs: List[str]
+    outputs: Dict[str, str]
+    build_content: Callable[[Dict[str, Any]], Dict[str, Any]]
+    timeout: Optional[float] = None
+    fallback: Optional[Dict[str, Any]] = None
+    cacheable: bool = False
+
+@dataclass
+class PipelineResult:
+    """Final context plus per-node execution details"""
+    context: Dict[str, Any]
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+    timed_out: List[str] = field(default_factory=list)
+    cached: List[str] = field(default_factory=list)
+
+class PipelineError(RuntimeError):
+    """Raised when a node without a fallback fails or the graph cannot finish"""
+
+class AgentPipeline:
+    """
+    Runs a DAG of PipelineNodes with maximal parallelism
+    """
+    
+    def __init__(self, nodes: List[PipelineNode], cache_size: int = 256):
+        names = [node.name for node in nodes]
+        if len(names) != len(set(names)):
+            raise ValueError("Pipeline node names must be unique")
+        
+        self.nodes = nodes
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    
+    async def run(
+        self,
+        send: SendFunc,
+        initial: Dict[str, Any],
+        correlation_id: str,
+        skip: Optional[Set[str]] = None,
+        default_timeout: Optional[float] = None
+    ) -> PipelineResult:
+        """Execute the graph, starting each node once all of its inputs exist"""
+        skip = skip or set()
+        result = PipelineResult(context=dict(initial))
+        context = result.context
+        pending = {node.name: node for node in self.nodes}
+        running: Dict[asyncio.Task, PipelineNode] = {}
+        
+        try:
+            while pending or running:
+                # Resolve skipped nodes and launch every node whose inputs are ready
+                for name, node in list(pending.items()):
+                    if not all(key in context for key in node.inputs):
+                        continue
+                    del pending[name]
+                    
+                    if name in skip:
+                        self._apply_fallback(node, context)
+                        result.skipped.append(name)
+                        continue
+                    
+                    cache_key = self._cache_key(node, context) if node.cacheable else None
+                    if cache_key is not None and cache_key in self._cache:
+                        self._cache.move_to_end(cache_key)
+                        self._apply_outputs(node, self._cache[cache_key], context)
+                        result.cached.append(name)
+                        result.timings_ms[name] = 0.0
+                        continue
+                    
+                    task = asyncio.create_task(self._run_node(
+                        send, node, context, correlation_id,
+                        node.timeout if node.timeout is not None else default_timeout,
+                        cache_key, result
+                    ))
+                    running[task] = node
+                
+                if not running:
+                    if pending:
+                        missing = {
+                            name: [key for key in node.inputs if key not in context]
+                            for name, node in pending.items()
+                        }
+                        raise PipelineError(f"Pipeline stalled, missing inputs: {missing}")
+                    break
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    running.pop(task)
+                    task.result()
+        finally:
+            for task in running:
+                task.cancel()
+        
+        return result
+    
+    async def _run_node(
+        self,
+        send: SendFunc,
+        node: PipelineNode,
+        context: Dict[str, Any],
+        correlation_id: str,
+        timeout: Optional[float],
+        cache_key: Optional[str],
+        result: PipelineResult
+    ) -> None:
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                send(node.agent_id, node.build_content(context), correlation_id),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            result.timed_out.append(node.name)
+            logger.warning(f"Pipeline node {node.name} timed out after {timeout}s")
+            if node.fallback is None:
+                raise PipelineError(f"Pipeline node {node.name} timed out")
+            self._apply_fallback(node, context)
+            return
+        except Exception as e:
+            if node.fallback is None:
+                raise
+            logger.error(f"Pipeline node {node.name} failed, using fallback: {e}")
+            self._apply_fallback(node, context)
+            return
+        finally:
+            result.timings_ms[node.name] = round((time.perf_counter() - started) * 1000, 2)
+        
+        self._apply_outputs(node, response, context)
+        if cache_key is not None:
+            self._cache[cache_key] = response
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def _apply_outputs(self, node: PipelineNode, response: Dict[str, Any], context: Dict[str, Any]) -> None:
+        for field_name, key in node.outputs.items():
+            context[key] = response if field_name == "*" else response.get(field_name)
+    
+    def _apply_fallback(self, node: PipelineNode, context: Dict[str, Any]) -> None:
+        fallback = node.fallback or {}
+        for key in node.outputs.values():
+            context[key] = fallback.get(key)
+    
+    def _cache_key(self, node: PipelineNode, context: Dict[str, Any]) -> Optional[str]:
+        try:
+            payload = json.dumps(
+                [node.name, {key: context[key] for key in node.inputs}],
+                sort_keys=True
+            )
+        except (TypeError, ValueError):
+            return None
+        return hash_text(payload)
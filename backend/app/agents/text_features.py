@@ -0,0 +1,82 @@
+"""
+Text Features
+One shared lexical pass over an argument: lower-case and tokenize once, look
+up every lexicon term once, and hand the heuristics a feature vector instead
+of letting each of them rescan the text
+"""
+
+from typing import Dict, FrozenSet, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Word lists read by the agents' heuristics. Terms match as substrings of the
+# lower-cased text ("data" also matches "database"), as the heuristics always have.
+LEXICONS: Dict[str, Tuple[str, ...]] = {
+    # EvaluationAgent
+    "logical_connectors": ("therefore", "thus", "hence", "because", "since", "consequently"),
+    "contrast": ("but", "however", "although"),
+    "evidence": ("research", "study", "data", "evidence", "statistics", "findings", "survey"),
+    # ArgumentGeneratorAgent
+    "structure_evidence": ("research", "study", "data", "evidence"),
+    "structure_reasoning": ("because", "therefore", "thus", "hence"),
+    # CounterArgumentAgent
+    "concession": ("however", "although", "while"),
+    "strategy_evidence": ("evidence", "research", "data"),
+    "logical_analysis": ("logic", "reasoning", "fallacy"),
+}
+
+# Citation markers are matched case-sensitively against the original text
+CITATION_MARKERS: Tuple[str, ...] = ("(", "according to", "states that")
+
+# Each distinct term is searched for once, however many lexicons share it
+_ALL_TERMS: Tuple[str, ...] = tuple(sorted({term for terms in LEXICONS.values() for term in terms}))
+_LEXICON_SETS: Dict[str, FrozenSet[str]] = {name: frozenset(terms) for name, terms in LEXICONS.items()}
+
+@dataclass(frozen=True, slots=True)
+class TextFeatures:
+    """Lexical features of one text"""
+    word_count: int  # whitespace tokens
+    sentence_count: int  # non-blank pieces between periods
+    sentence_word_count: int  # words across those pieces
+    words: FrozenSet[str]  # distinct lower-cased tokens
+    terms: FrozenSet[str]  # lexicon terms present in the text
+    has_citation: bool
+    
+    @property
+    def avg_sentence_length(self) -> float:
+        return self.sentence_word_count / max(self.sentence_count, 1)
+    
+    def count(self, lexicon: str) -> int:
+        """Number of distinct terms of a lexicon present in the text"""
+        return len(self.terms & _LEXICON_SETS[lexicon])
+    
+    def has_any(self, lexicon: str) -> bool:
+        return not self.terms.isdisjoint(_LEXICON_SETS[lexicon])
+
+@lru_cache(maxsize=256)
+def analyze_text(text: str) -> TextFeatures:
+    """
+    Compute the features of a text
+    
+    Cached, so agents looking at the same argument in one turn (e.g. the
+    rebuttal's strategy and its evaluation) share a single pass
+    """
+    lowered = text.lower()
+    tokens = lowered.split()
+    
+    # Substring search in C beats a compiled alternation regex here, and the
+    # union of the lexicons is only a couple of dozen terms
+    terms = frozenset(term for term in _ALL_TERMS if term in lowered)
+    
+    sentence_count = sum(1 for piece in text.split(".") if piece and not piece.isspace())
+    # Splitting each sentence on whitespace is the same as splitting the text with periods blanked
+    sentence_word_count = len(text.replace(".", " ").split()) if "." in text else len(tokens)
+    
+    return TextFeatures(
+        word_count=len(tokens),
+        sentence_count=sentence_count,
+        sentence_word_count=sentence_word_count,
+        words=frozenset(tokens),
+        terms=terms,
+        has_citation=any(marker in text for marker in CITATION_MARKERS)
+    )
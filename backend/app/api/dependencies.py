@@ -4,6 +4,7 @@ API Shared Dependencies -- > for FastAPI routes
 
 from fastapi import Depends, HTTPException, status, Header
 from typing import Optional
+from app.config import settings
 from app.security.auth import AuthService, verify_token
 from app.security.rate_limiter import RateLimiter
 from app.agents.agent_coordinator import AgentCoordinator
@@ -15,55 +16,109 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-# Singleton instances
-_coordinator = None
-_llm_service = None
-_ir_service = None
-_web_scraper = None
-_doc_processor = None
-_rate_limiter = None
+class ServiceContainer:
+    """
+    Holds the long-lived services shared by every request
+    Built once in the application lifespan and torn down on shutdown
+    """
+
+    def __init__(self):
+        self.llm_service: Optional[LLMService] = None
+        self.ir_service: Optional[InformationRetrieval] = None
+        self.web_scraper: Optional[WebScraper] = None
+        self.doc_processor: Optional[DocumentProcessor] = None
+        self.coordinator: Optional[AgentCoordinator] = None
+        self.rate_limiter: Optional[RateLimiter] = None
+        self.started = False
+
+    def _build(self) -> None:
+        """Construct all services once, sharing the LLM and IR services"""
+        self.llm_service = LLMService()
+        self.ir_service = InformationRetrieval(llm_service=self.llm_service)
+        self.web_scraper = WebScraper()
+        self.doc_processor = DocumentProcessor()
+        self.coordinator = AgentCoordinator(
+            llm_service=self.llm_service,
+            ir_service=self.ir_service
+        )
+        self.rate_limiter = RateLimiter(
+            max_requests=settings.RATE_LIMIT_REQUESTS,
+            window_seconds=settings.RATE_LIMIT_WINDOW
+        )
+        self.started = True
+
+    async def startup(self) -> None:
+        """Startup hook, called from the application lifespan"""
+        if self.started:
+            return
+
+        logger.info("Starting service container")
+        self._build()
+        await self.llm_service.start()
+
+    async def shutdown(self) -> None:
+        """Shutdown hook, releases shared services"""
+        if not self.started:
+            return
+
+        logger.info("Shutting down service container")
+        if self.coordinator is not None:
+            await self.coordinator.shutdown()
+        if self.llm_service is not None:
+            await self.llm_service.close()
+        
+        self.coordinator = None
+        self.ir_service = None
+        self.llm_service = None
+        self.web_scraper = None
+        self.doc_processor = None
+        self.rate_limiter = None
+        self.started = False
+
+    def ensure_started(self) -> None:
+        """
+        Build services lazily when used outside the lifespan
+        (e.g. a TestClient that was not entered as a context manager)
+        """
+        if not self.started:
+            self._build()
+
+# Singleton instance
+_container = ServiceContainer()
+
+def get_container() -> ServiceContainer:
+    """Get the shared service container"""
+    return _container
 
 def get_coordinator() -> AgentCoordinator:
     """Get agent coordinator singleton"""
-    global _coordinator
-    if _coordinator is None:
-        _coordinator = AgentCoordinator()
-    return _coordinator
+    _container.ensure_started()
+    return _container.coordinator
 
 def get_llm_service() -> LLMService:
     """Get LLM service singleton"""
-    global _llm_service
-    if _llm_service is None:
-        _llm_service = LLMService()
-    return _llm_service
+    _container.ensure_started()
+    return _container.llm_service
 
 def get_ir_service() -> InformationRetrieval:
     """Get information retrieval service singleton"""
-    global _ir_service
-    if _ir_service is None:
-        _ir_service = InformationRetrieval()
-    return _ir_service
+    _container.ensure_started()
+    return _container.ir_service
 
 def get_web_scraper() -> WebScraper:
     """Get web scraper singleton"""
-    global _web_scraper
-    if _web_scraper is None:
-        _web_scraper = WebScraper()
-    return _web_scraper
+    _container.ensure_started()
+    return _container.web_scraper
 
 def get_document_processor() -> DocumentProcessor:
     """Get document processor singleton"""
-    global _doc_processor
-    if _doc_processor is None:
-        _doc_processor = DocumentProcessor()
-    return _doc_processor
+    _container.ensure_started()
+    return _container.doc_processor
 
 def get_rate_limiter() -> RateLimiter:
     """Get rate limiter singleton"""
-    global _rate_limiter
-    if _rate_limiter is None:
-        _rate_limiter = RateLimiter(max_requests=100, window_seconds=60)
-    return _rate_limiter
+    _container.ensure_started()
+    return _container.rate_limiter
 
 async def verify_api_key(x_api_key: Optional[str] = Header(None)):
     """
@@ -4,17 +4,21 @@ Main endpoints for debate functionality
 """
 
 from fastapi import APIRouter, HTTPException, WebSocket, Depends
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
+from collections import Counter
 from app.agents.agent_coordinator import AgentCoordinator
+from app.api.dependencies import get_coordinator, get_rate_limiter
 from app.security.input_validator import InputValidator
 from app.security.rate_limiter import RateLimiter
+from app.config import settings
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 validator = InputValidator()
-rate_limiter = RateLimiter()
 
 class DebateRequest(BaseModel):
     topic: str
@@ -25,6 +29,15 @@ class ArgumentRequest(BaseModel):
     argument: str
     round_number: int
 
+class BatchTurnItem(BaseModel):
+    debate_id: str
+    argument: str
+    context: Dict[str, Any] = {}
+
+class BatchTurnRequest(BaseModel):
+    items: List[BatchTurnItem] = Field(..., min_length=1)
+    concurrency: Optional[int] = None
+
 class DebateResponse(BaseModel):
     debate_id: str
     status: str
@@ -54,7 +67,11 @@ async def start_debate(request: DebateRequest):
     )
 
 @router.post("/argument")
-async def submit_argument(request: ArgumentRequest, coordinator: AgentCoordinator = Depends()):
+async def submit_argument(
+    request: ArgumentRequest,
+    coordinator: AgentCoordinator = Depends(get_coordinator),
+    rate_limiter: RateLimiter = Depends(get_rate_limiter)
+):
     """Submit an argument and get AI response"""
     
     # Validate and sanitize
@@ -74,13 +91,74 @@ async def submit_argument(request: ArgumentRequest, coordinator: AgentCoordinato
     
     return result
 
+@router.post("/batch")
+async def submit_batch(
+    request: BatchTurnRequest,
+    coordinator: AgentCoordinator = Depends(get_coordinator),
+    rate_limiter: RateLimiter = Depends(get_rate_limiter)
+):
+    """
+    Submit many turns at once; results stream back as NDJSON in completion order
+    
+    Each line carries the item's index, debate_id, status and either the turn
+    result or an error. Turns of the same debate run in submission order.
+    """
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large (max {settings.BATCH_MAX_ITEMS} items)"
+        )
+    
+    for index, item in enumerate(request.items):
+        if not validator.sanitize_text(item.argument):
+            raise HTTPException(status_code=400, detail=f"Invalid argument at index {index}")
+    
+    # Every item is a turn, so each one counts against its debate's limit;
+    # the batch is charged all at once or not at all
+    limited = await rate_limiter.check_rate_limits(Counter(item.debate_id for item in request.items))
+    if limited is not None:
+        raise HTTPException(status_code=429, detail=f"Rate limit exceeded for {limited}")
+    
+    concurrency = min(request.concurrency or settings.BATCH_CONCURRENCY, settings.BATCH_CONCURRENCY)
+    
+    async def stream_results():
+        async for line in coordinator.process_batch(
+            [item.model_dump() for item in request.items],
+            concurrency=concurrency
+        ):
+            yield json.dumps(line, default=str) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 @router.get("/history/{debate_id}")
-async def get_debate_history(debate_id: str, coordinator: AgentCoordinator = Depends()):
+async def get_debate_history(debate_id: str, coordinator: AgentCoordinator = Depends(get_coordinator)):
     """Get debate history"""
-    history = coordinator.get_debate_history(debate_id)
+    history = await coordinator.get_debate_history(debate_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Debate not found")
     return {"debate_id": debate_id, "history": history}
 
+@router.get("/feedback/{debate_id}/{round_number}")
+async def get_round_feedback(
+    debate_id: str,
+    round_number: int,
+    coordinator: AgentCoordinator = Depends(get_coordinator)
+):
+    """Get a round's feedback; status is "pending" until background generation finishes"""
+    feedback = await coordinator.get_feedback(debate_id, round_number)
+    if feedback is None:
+        raise HTTPException(status_code=404, detail="Round not found")
+    return feedback
+
+@router.get("/scoreboard/{debate_id}")
+async def get_scoreboard(debate_id: str, coordinator: AgentCoordinator = Depends(get_coordinator)):
+    """Get running scores, win counts and streaks for a live scoreboard"""
+    scoreboard = await coordinator.get_scoreboard(debate_id)
+    if scoreboard is None:
+        raise HTTPException(status_code=404, detail="Debate not found")
+    return {"debate_id": debate_id, **scoreboard}
+
 @router.get("/agent-status")
-async def get_agent_status(coordinator: AgentCoordinator = Depends()):
+async def get_agent_status(coordinator: AgentCoordinator = Depends(get_coordinator)):
     """Get status of all agents"""
     return coordinator.get_all_agent_status()
\ No newline at end of file
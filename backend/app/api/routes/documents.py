@@ -6,6 +6,7 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from typing import List
 from app.services.document_processor import DocumentProcessor
 from app.services.information_retrieval import InformationRetrieval
+from app.api.dependencies import get_document_processor, get_ir_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,8 +15,8 @@ router = APIRouter()
 @router.post("/upload")
 async def upload_documents(
     files: List[UploadFile] = File(...),
-    processor: DocumentProcessor = Depends(),
-    ir_service: InformationRetrieval = Depends()
+    processor: DocumentProcessor = Depends(get_document_processor),
+    ir_service: InformationRetrieval = Depends(get_ir_service)
 ):
     """Upload and process documents for debate knowledge base"""
     
@@ -8,6 +8,7 @@ from typing import List, Optional
 from app.services.web_scraper import WebScraper
 from app.services.information_retrieval import InformationRetrieval
 from app.security.input_validator import InputValidator
+from app.api.dependencies import get_web_scraper, get_ir_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,8 +22,8 @@ class ScrapeRequest(BaseModel):
 @router.post("/scrape")
 async def scrape_topic(
     request: ScrapeRequest,
-    scraper: WebScraper = Depends(),
-    ir_service: InformationRetrieval = Depends()
+    scraper: WebScraper = Depends(get_web_scraper),
+    ir_service: InformationRetrieval = Depends(get_ir_service)
 ):
     """Scrape web content for debate topic"""
     
@@ -3,7 +3,7 @@ Configuration Management with Ollama Support
 """
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Dict
 import os
 
 class Settings(BaseSettings):
@@ -25,12 +25,30 @@ class Settings(BaseSettings):
     # Ollama Settings (FREE!)
     OLLAMA_URL: str = "http://localhost:11434"
     
+    # Multiple Ollama hosts (falls back to OLLAMA_URL when empty)
+    OLLAMA_URLS: List[str] = []
+    OLLAMA_HEALTH_CHECK_INTERVAL: float = 15.0  # seconds
+    OLLAMA_FAILURE_THRESHOLD: int = 3  # consecutive failures before ejection
+    OLLAMA_MODEL_AFFINITY: Dict[str, List[str]] = {}  # model -> preferred URLs
+    
+    # Shared HTTP connection pool used by the LLM service
+    LLM_HTTP_TIMEOUT: float = 60.0
+    LLM_HTTP_MAX_CONNECTIONS: int = 20
+    LLM_HTTP_MAX_KEEPALIVE: int = 10
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_HTTP2: bool = False  # Requires the 'h2' package
+    
     # OpenAI Settings (optional, only if using OpenAI)
     OPENAI_API_KEY: str = ""
     
     # Anthropic Settings (optional, only if using Anthropic)
     ANTHROPIC_API_KEY: str = ""
     
+    # Maximum concurrent in-flight LLM calls per provider
+    OLLAMA_MAX_CONCURRENCY: int = 16
+    OPENAI_MAX_CONCURRENCY: int = 8
+    ANTHROPIC_MAX_CONCURRENCY: int = 8
+    
     # Model Selection based on provider
     LLM_MODEL: str = "llama3.2:3b"  # Ollama model
     # For OpenAI: "gpt-4-turbo-preview" or "gpt-3.5-turbo"
@@ -39,16 +57,84 @@ class Settings(BaseSettings):
     LLM_TEMPERATURE: float = 0.7
     LLM_MAX_TOKENS: int = 2000
     
+    # LLM Response Cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_TTL: int = 3600  # seconds
+    LLM_CACHE_DISK_PATH: str = ""  # e.g. "./data/llm_cache.db", empty = memory only
+    
+    # Agents
+    AGENT_MESSAGE_HISTORY_SIZE: int = 100  # recent messages kept per agent
+    
+    # Agent message bus (bounded queue and worker pool per agent)
+    AGENT_BUS_QUEUE_SIZE: int = 200
+    AGENT_BUS_WORKERS: int = 8
+    AGENT_BUS_QUEUE_SIZES: Dict[str, int] = {}  # per-agent overrides, e.g. {"counter_argument": 50}
+    AGENT_BUS_WORKER_COUNTS: Dict[str, int] = {}  # per-agent overrides, e.g. {"evaluation_agent": 16}
+    AGENT_BUS_ENQUEUE_TIMEOUT: float = 0.0  # seconds to wait for queue space before rejecting
+    
+    # Round evaluation
+    # "combined": one JSON LLM call for both persuasiveness scores and feedback
+    # "separate": one call per score plus one for feedback
+    EVALUATION_MODE: str = "combined"
+    # "deferred": feedback text is generated after the turn returns (GET /feedback, WebSocket push)
+    # "inline": the turn waits for it
+    EVALUATION_FEEDBACK_MODE: str = "deferred"
+    # Overrides of the heuristic criteria weights (see HeuristicWeights), e.g. {"citation_bonus": 1.5};
+    # rescore stored rounds after changing them: python -m app.services.rescoring
+    EVALUATION_HEURISTIC_WEIGHTS: Dict[str, float] = {}
+    # "llm": ask the LLM for persuasiveness; "local": use the trained model at PERSUASIVENESS_MODEL_PATH
+    # (train it with: python -m app.services.persuasiveness_model train)
+    PERSUASIVENESS_SCORER: str = "llm"
+    PERSUASIVENESS_MODEL_PATH: str = "./data/persuasiveness_model.json"
+    
+    # Debate history compaction for counter-argument prompts
+    HISTORY_VERBATIM_ROUNDS: int = 3
+    HISTORY_SUMMARY_MAX_CHARS: int = 1200
+    HISTORY_SUMMARY_MAX_TOKENS: int = 200
+    
+    # Batch turn API
+    BATCH_MAX_ITEMS: int = 1000
+    BATCH_CONCURRENCY: int = 8  # debates processed at once
+    
+    # Per-debate turn locks
+    DEBATE_LOCK_IDLE_TTL: float = 300.0  # seconds before an unused lock is evicted
+    
+    # Agent pipeline (debate-turn DAG)
+    PIPELINE_NODE_TIMEOUT: float = 120.0  # seconds, per node
+    PIPELINE_SKIP_NODES: List[str] = ["evidence"]  # e.g. [] to add retrieval to rebuttals
+    
     # Embedding Model
     EMBEDDING_MODEL: str = "nomic-embed-text"  # For Ollama
     # For OpenAI: "text-embedding-ada-002"
     
+    # Batch embedding (embed_many)
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_BATCH_CONCURRENCY: int = 4
+    
+    # Embedding Cache (persists across restarts)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "./data/embedding_cache.db"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 100000
+    
     # Vector Store
     VECTOR_STORE_PATH: str = "./data/vector_store"
     
     # Database
     DATABASE_URL: str = "sqlite:///./debate_system.db"
     
+    # Redis
+    REDIS_URL: str = "redis://localhost:6379/0"
+    
+    # Debate state store
+    # "memory": LRU of active debates, evicted ones spill to the database (single worker)
+    # "redis": shared between workers and pods via REDIS_URL
+    DEBATE_STATE_BACKEND: str = "memory"
+    DEBATE_STATE_TTL: int = 7 * 24 * 3600  # seconds of inactivity before a Redis debate expires
+    DEBATE_STATE_MAX_DEBATES: int = 1000
+    DEBATE_STATE_MAX_BYTES: int = 64 * 1024 * 1024  # 64MB
+    DEBATE_STATE_SPILL_TO_DB: bool = True
+    
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 60
@@ -3,7 +3,8 @@ FastAPI Application Entry Point
 Implements the main API server with all routes and middleware
 """
 
-from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.security import HTTPBearer
@@ -16,7 +17,8 @@ from app.config import settings
 from app.api.routes import debate, documents, webscrape
 from app.security.rate_limiter import RateLimiter
 from app.security.auth import verify_token
-from app.agents.agent_coordinator import AgentCoordinator
+from app.api.dependencies import get_container, get_coordinator
+from app.agents.message_bus import BusOverloadedError
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -26,12 +28,15 @@ security = HTTPBearer()
 async def lifespan(app: FastAPI):
     """Initialize and cleanup resources"""
     logger.info("Starting AI Debate System")
-   
-    # Initialize agent coordinator
 
-    app.state.coordinator = AgentCoordinator()
+    # Build the shared service container once per process
+    container = get_container()
+    await container.startup()
+    app.state.container = container
+    app.state.coordinator = container.coordinator
     yield
     logger.info("Shutting down AI Debate System")
+    await container.shutdown()
 
 app = FastAPI(
     title = "AI Debate System",
@@ -62,6 +67,15 @@ app.include_router(debate.router, prefix="/api/v1/debate",tags=["debate"])
 app.include_router(documents.router, prefix="/api/v1/documents",tags=["documents"])
 app.include_router(webscrape.router, prefix="/api/v1/webscrape", tags=["scrape"])
 
+@app.exception_handler(BusOverloadedError)
+async def bus_overloaded_handler(request: Request, exc: BusOverloadedError):
+    """Shed load with 503 when an agent queue is full"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "agent": exc.agent_id},
+        headers={"Retry-After": "1"}
+    )
+
 @app.get("/")
 async def root():
     return {
@@ -78,20 +92,26 @@ async def health_check():
 @app.websocket("/ws/debate/{debate_id}")
 async def debate_websocket(websocket: WebSocket, debate_id: str):
     await websocket.accept()
-    coordinator = app.state.coordinator
+    coordinator = get_coordinator()
 
     try:
         while True:
             data = await websocket.receive_json()
 
-            #process through agent coordinator
-            result = await coordinator.process_debate_turn(
-                debate_id = debate_id,
-                user_argument=data.get("argument"),
-                context=data.get("context",{})
-            )
-
-            await websocket.send_json(result)
+            #process through agent coordinator, streaming rebuttal tokens as they arrive;
+            #deferred round feedback is pushed later as a {"type": "feedback"} event
+            try:
+                result = await coordinator.process_debate_turn(
+                    debate_id = debate_id,
+                    user_argument=data.get("argument"),
+                    context=data.get("context",{}),
+                    event_callback=websocket.send_json
+                )
+            except BusOverloadedError as e:
+                await websocket.send_json({"type": "error", "status": 503, "detail": str(e)})
+                continue
+
+            await websocket.send_json({"type": "turn_result", **result})
 
     except WebSocketDisconnect:
         logger.info(f"Client disconnected from debate {debate_id}")
@@ -0,0 +1,39 @@
+"""
+Database Session Management
+Lazily created SQLAlchemy engine and session factory
+"""
+
+from typing import Optional
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker, Session
+from app.config import settings
+from app.models.debate import Base
+import logging
+
+logger = logging.getLogger(__name__)
+
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+
+def get_engine() -> Engine:
+    """Get the shared engine, creating it (and any missing tables) on first use"""
+    global _engine
+    if _engine is None:
+        connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
+        _engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, connect_args=connect_args)
+        init_db(_engine)
+    return _engine
+
+def init_db(engine: Engine) -> None:
+    """Create tables that do not exist yet"""
+    # Import models so they are registered on Base.metadata
+    from app.models import message, user  # noqa: F401
+    Base.metadata.create_all(bind=engine)
+
+def get_session() -> Session:
+    """Open a new session bound to the shared engine"""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(bind=get_engine(), autoflush=False, expire_on_commit=False)
+    return _session_factory()
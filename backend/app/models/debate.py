@@ -15,7 +15,8 @@ class Debate(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     total_rounds = Column(Integer, default=0)
     final_winner = Column(String, nullable=True)  # human, ai, draw
-    metadata = Column(JSON, default={})
+    # "metadata" is reserved on declarative models, so map the column under another name
+    debate_metadata = Column("metadata", JSON, default={})
 
 class DebateRound(Base):
     __tablename__ = "debate_rounds"
@@ -3,7 +3,7 @@ Rate Limiting
 Prevents abuse and ensures fair usage
 """
 
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime, timedelta
 from collections import defaultdict
 import asyncio
@@ -22,29 +22,42 @@ class RateLimiter:
         self.requests: Dict[str, list] = defaultdict(list)
         self.lock = asyncio.Lock()
     
-    async def check_rate_limit(self, identifier: str) -> bool:
+    async def check_rate_limit(self, identifier: str, cost: int = 1) -> bool:
         """
         Check if request is within rate limit
         Returns True if allowed, False if rate limit exceeded
+        
+        A request may count as several (cost); it is admitted only if all of
+        them fit in the window, and nothing is recorded when it is rejected
+        """
+        return await self.check_rate_limits({identifier: cost}) is None
+    
+    async def check_rate_limits(self, costs: Dict[str, int]) -> Optional[str]:
+        """
+        Check requests for several identifiers as one unit
+        Returns None and records them all if every identifier is within its
+        limit; otherwise records nothing and returns the first one over it
         """
         async with self.lock:
             now = datetime.now()
             cutoff = now - timedelta(seconds=self.window_seconds)
             
-            # Remove old requests
-            self.requests[identifier] = [
-                req_time for req_time in self.requests[identifier]
-                if req_time > cutoff
-            ]
-            
-            # Check limit
-            if len(self.requests[identifier]) >= self.max_requests:
-                logger.warning(f"Rate limit exceeded for {identifier}")
-                return False
+            for identifier, cost in costs.items():
+                # Remove old requests
+                self.requests[identifier] = [
+                    req_time for req_time in self.requests[identifier]
+                    if req_time > cutoff
+                ]
+                
+                # Check limit
+                if len(self.requests[identifier]) + cost > self.max_requests:
+                    logger.warning(f"Rate limit exceeded for {identifier}")
+                    return identifier
             
-            # Add current request
-            self.requests[identifier].append(now)
-            return True
+            # Add current requests
+            for identifier, cost in costs.items():
+                self.requests[identifier].extend([now] * cost)
+            return None
     
     def get_remaining(self, identifier: str) -> int:
         """Get remaining requests for identifier"""
@@ -7,10 +7,22 @@ from app.services.llm_service import LLMService
 from app.services.information_retrieval import InformationRetrieval
 from app.services.web_scraper import WebScraper
 from app.services.document_processor import DocumentProcessor
+from app.services.response_cache import ResponseCache
+from app.services.embedding_cache import EmbeddingCache
+from app.services.score_aggregate import ScoreAggregate
+from app.services.debate_store import DebateState, DebateStateStore, InMemoryDebateStore, TurnRecord, create_debate_store
 
 __all__ = [
     'LLMService',
     'InformationRetrieval',
     'WebScraper',
-    'DocumentProcessor'
+    'DocumentProcessor',
+    'ResponseCache',
+    'EmbeddingCache',
+    'DebateState',
+    'DebateStateStore',
+    'TurnRecord',
+    'InMemoryDebateStore',
+    'ScoreAggregate',
+    'create_debate_store'
 ]
\ No newline at end of file
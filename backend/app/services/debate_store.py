@@ -0,0 +1,544 @@
+"""
+Debate State Store
+Per-debate history and rolling summaries behind a pluggable interface.
+The in-memory store keeps an LRU of active debates under an entry/byte cap
+and spills evicted debates to the Debate/DebateRound tables.
+"""
+
+from typing import Dict, Any, List, Optional, Set, Tuple, Union
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+import asyncio
+import json
+import sys
+from app.config import settings
+from app.services.single_flight import SingleFlight
+from app.services.score_aggregate import ScoreAggregate
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass(slots=True)
+class TurnRecord:
+    """
+    One finished debate round
+    
+    Slotted with fixed fields; repeated short strings (keywords, winners,
+    agent ids) are interned, and the JSON form is built only when the record
+    is spilled or shared, then cached. Supports dict-style reads (get/[])
+    so code written against the old turn dicts keeps working.
+    """
+    round_number: int
+    human_argument: str
+    ai_argument: str
+    keywords: Tuple[str, ...] = ()
+    evaluation: Optional[Dict[str, Any]] = None
+    timestamp: str = ""
+    _json: Optional[str] = field(default=None, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.keywords = tuple(sys.intern(keyword) for keyword in self.keywords)
+        if self.evaluation:
+            for key in ("round_winner", "agent"):
+                if isinstance(self.evaluation.get(key), str):
+                    self.evaluation[key] = sys.intern(self.evaluation[key])
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _TURN_FIELDS:
+            return getattr(self, key)
+        return default
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in _TURN_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "round_number": self.round_number,
+            "human_argument": self.human_argument,
+            "ai_argument": self.ai_argument,
+            "keywords": list(self.keywords),
+            "evaluation": self.evaluation,
+            "timestamp": self.timestamp
+        }
+    
+    def to_json(self) -> str:
+        """Compact JSON, built on first use and cached"""
+        if self._json is None:
+            self._json = json.dumps(self.to_dict(), separators=(",", ":"), default=str)
+        return self._json
+    
+    def invalidate(self) -> None:
+        """Drop the cached JSON after mutating the evaluation in place"""
+        self._json = None
+    
+    def renumber(self, round_number: int) -> None:
+        """Give the record its final round number when it is appended"""
+        if round_number == self.round_number:
+            return
+        self.round_number = round_number
+        if self.evaluation and "round" in self.evaluation:
+            self.evaluation = {**self.evaluation, "round": round_number}
+        self.invalidate()
+    
+    def set_feedback(self, feedback: Optional[str], status: str) -> None:
+        """Attach deferred feedback to the evaluation"""
+        # Copy rather than mutate: the turn response may still hold the old dict
+        self.evaluation = {**(self.evaluation or {}), "feedback": feedback, "feedback_status": status}
+        self.invalidate()
+    
+    def approx_bytes(self) -> int:
+        """Resident size estimate that does not serialize the record"""
+        evaluation = self.evaluation or {}
+        return (
+            len(self.human_argument) + len(self.ai_argument)
+            + sum(len(keyword) for keyword in self.keywords)
+            + len(str(evaluation.get("feedback", "")))
+            + 512
+        )
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TurnRecord":
+        return cls(
+            round_number=data.get("round_number") or 0,
+            human_argument=data.get("human_argument", ""),
+            ai_argument=data.get("ai_argument", ""),
+            keywords=tuple(data.get("keywords") or ()),
+            evaluation=data.get("evaluation"),
+            timestamp=data.get("timestamp") or ""
+        )
+    
+    @classmethod
+    def from_json(cls, raw: str) -> "TurnRecord":
+        record = cls.from_dict(json.loads(raw))
+        record._json = raw
+        return record
+    
+    @classmethod
+    def coerce(cls, record: Union["TurnRecord", Dict[str, Any]]) -> "TurnRecord":
+        return record if isinstance(record, cls) else cls.from_dict(record)
+
+_TURN_FIELDS = frozenset(f.name for f in fields(TurnRecord) if not f.name.startswith("_"))
+
+@dataclass
+class DebateState:
+    """Everything the coordinator keeps about one debate"""
+    debate_id: str
+    rounds: List[TurnRecord] = field(default_factory=list)
+    topic: str = ""
+    summary: str = ""
+    summarized_through: int = 0  # last round folded into the summary
+    persisted_rounds: int = 0  # rounds already written to the database
+    size_bytes: int = 0  # approximate resident size
+    scores: ScoreAggregate = field(default_factory=ScoreAggregate)
+    dirty_rounds: Set[int] = field(default_factory=set)  # persisted rounds changed since written
+
+def estimate_record_bytes(record: TurnRecord) -> int:
+    """Rough resident size of a turn record"""
+    return record.approx_bytes()
+
+class DebateStateStore(ABC):
+    """
+    Interface for debate state backends
+    """
+    
+    @abstractmethod
+    async def load(self, debate_id: str) -> DebateState:
+        """Return the state for a debate, creating an empty one if unknown"""
+    
+    @abstractmethod
+    async def exists(self, debate_id: str) -> bool:
+        """Whether anything is stored for a debate; never creates or caches state"""
+    
+    @abstractmethod
+    async def allocate_round(self, debate_id: str) -> int:
+        """Return a provisional round number for the next turn (for prompts and events)"""
+    
+    @abstractmethod
+    async def append_round(self, debate_id: str, record: TurnRecord, topic: str = "") -> DebateState:
+        """
+        Append a finished turn record and return the updated state
+        
+        The record is renumbered to one past the last stored round, so turns
+        that fail before they are appended leave no gaps
+        """
+    
+    @abstractmethod
+    async def save_summary(self, debate_id: str, summary: str, summarized_through: int) -> None:
+        """Store the rolling summary of older rounds"""
+    
+    @abstractmethod
+    async def save_feedback(
+        self,
+        debate_id: str,
+        round_number: int,
+        feedback: Optional[str],
+        status: str
+    ) -> bool:
+        """Attach deferred feedback to a stored round; False if the round is unknown"""
+    
+    async def get_history(self, debate_id: str) -> List[TurnRecord]:
+        """Return every round of a debate"""
+        return (await self.load(debate_id)).rounds
+    
+    async def get_scores(self, debate_id: str) -> ScoreAggregate:
+        """Return the running score aggregate of a debate"""
+        return (await self.load(debate_id)).scores
+    
+    async def close(self) -> None:
+        """Flush and release resources"""
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {}
+
+class DebateRepository:
+    """
+    Reads and writes debate state through the SQLAlchemy models (blocking calls)
+    """
+    
+    def load(self, debate_id: str) -> Optional[DebateState]:
+        from app.models.database import get_session
+        from app.models.debate import Debate, DebateRound
+        
+        with get_session() as session:
+            debate = session.get(Debate, debate_id)
+            if debate is None:
+                return None
+            
+            rows = (
+                session.query(DebateRound)
+                .filter(DebateRound.debate_id == debate_id)
+                .order_by(DebateRound.round_number)
+                .all()
+            )
+            rounds = [
+                TurnRecord(
+                    round_number=row.round_number,
+                    human_argument=row.human_argument,
+                    ai_argument=row.ai_argument,
+                    keywords=tuple(row.keywords or ()),
+                    evaluation=row.evaluation_data or {},
+                    timestamp=row.created_at.isoformat() if row.created_at else ""
+                )
+                for row in rows
+            ]
+            meta = debate.debate_metadata or {}
+            
+            # Rebuild the aggregate only if it is missing or out of step with the rounds
+            scores = meta.get("scores")
+            if scores and scores.get("rounds") == len(rounds):
+                aggregate = ScoreAggregate.from_dict(scores)
+            else:
+                aggregate = ScoreAggregate.from_rounds(rounds)
+            
+            return DebateState(
+                debate_id=debate_id,
+                rounds=rounds,
+                topic=debate.topic or "",
+                summary=meta.get("summary", ""),
+                summarized_through=meta.get("summarized_through", 0),
+                persisted_rounds=len(rounds),
+                size_bytes=sum(estimate_record_bytes(r) for r in rounds),
+                scores=aggregate
+            )
+    
+    def load_scores(self, debate_id: str) -> Optional[ScoreAggregate]:
+        """The stored score aggregate, without loading the rounds' arguments"""
+        from sqlalchemy import func
+        from app.models.database import get_session
+        from app.models.debate import Debate, DebateRound
+        
+        with get_session() as session:
+            row = session.query(Debate.debate_metadata).filter(Debate.id == debate_id).first()
+            if row is None:
+                return None
+            
+            scores = (row.debate_metadata or {}).get("scores")
+            stored_rounds = (
+                session.query(func.count(DebateRound.id))
+                .filter(DebateRound.debate_id == debate_id)
+                .scalar()
+            )
+            if scores and scores.get("rounds") == stored_rounds:
+                return ScoreAggregate.from_dict(scores)
+            
+            # Missing or stale: rebuild from the evaluations alone
+            rows = (
+                session.query(DebateRound.round_number, DebateRound.evaluation_data)
+                .filter(DebateRound.debate_id == debate_id)
+                .order_by(DebateRound.round_number)
+            )
+            return ScoreAggregate.from_rounds([
+                {"round_number": round_number, "evaluation": evaluation or {}}
+                for round_number, evaluation in rows
+            ])
+    
+    def exists(self, debate_id: str) -> bool:
+        from app.models.database import get_session
+        from app.models.debate import Debate
+        
+        with get_session() as session:
+            return session.query(Debate.id).filter(Debate.id == debate_id).first() is not None
+    
+    def save(self, state: DebateState) -> None:
+        from app.models.database import get_session
+        from app.models.debate import Debate, DebateRound
+        
+        rounds = list(state.rounds)
+        new_rounds = rounds[state.persisted_rounds:]
+        
+        with get_session() as session:
+            debate = session.get(Debate, state.debate_id)
+            if debate is None:
+                debate = Debate(id=state.debate_id, topic=state.topic, debate_metadata={})
+                session.add(debate)
+            
+            debate.total_rounds = len(rounds)
+            debate.debate_metadata = {
+                **(debate.debate_metadata or {}),
+                "summary": state.summary,
+                "summarized_through": state.summarized_through,
+                "scores": state.scores.to_dict()
+            }
+            
+            for record in new_rounds:
+                evaluation = record.evaluation or {}
+                timestamp = record.timestamp
+                session.add(DebateRound(
+                    debate_id=state.debate_id,
+                    round_number=record.round_number,
+                    human_argument=record.human_argument,
+                    ai_argument=record.ai_argument,
+                    human_score=round(evaluation.get("human_scores", {}).get("total", 0)),
+                    ai_score=round(evaluation.get("ai_scores", {}).get("total", 0)),
+                    round_winner=evaluation.get("round_winner"),
+                    keywords=list(record.keywords),
+                    evaluation_data=evaluation,
+                    created_at=datetime.fromisoformat(timestamp) if timestamp else datetime.utcnow()
+                ))
+            
+            # Rewrite rounds whose evaluation changed after they were first written
+            dirty = set(state.dirty_rounds)
+            if dirty:
+                evaluations = {
+                    record.round_number: record.evaluation
+                    for record in rounds[:state.persisted_rounds]
+                    if record.round_number in dirty
+                }
+                rows = (
+                    session.query(DebateRound)
+                    .filter(DebateRound.debate_id == state.debate_id)
+                    .filter(DebateRound.round_number.in_(list(evaluations)))
+                    .all()
+                )
+                for row in rows:
+                    row.evaluation_data = evaluations[row.round_number]
+            
+            session.commit()
+        
+        state.persisted_rounds = len(rounds)
+        state.dirty_rounds -= dirty
+
+class InMemoryDebateStore(DebateStateStore):
+    """
+    LRU of active debates bounded by entry count and approximate bytes
+    Evicted debates are spilled to the database and restored on next access
+    """
+    
+    def __init__(
+        self,
+        max_debates: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        repository: Optional[DebateRepository] = None
+    ):
+        self.max_debates = max(max_debates, 1)
+        self.max_bytes = max_bytes
+        self.repository = repository
+        
+        self._states: "OrderedDict[str, DebateState]" = OrderedDict()
+        self._spilling: Dict[str, DebateState] = {}
+        self._loads = SingleFlight()
+        self._bytes = 0
+        
+        self.evictions = 0
+        self.restores = 0
+        self.spill_errors = 0
+    
+    async def load(self, debate_id: str) -> DebateState:
+        state = self._states.get(debate_id)
+        if state is not None:
+            self._states.move_to_end(debate_id)
+            return state
+        
+        # Concurrent loads of the same debate share one restore
+        restored = await self._loads.do(debate_id, lambda: self._restore(debate_id))
+        
+        state = self._states.get(debate_id)
+        if state is None:
+            state = restored
+            self._states[debate_id] = state
+            self._bytes += state.size_bytes
+            await self._evict()
+        return state
+    
+    async def _restore(self, debate_id: str) -> DebateState:
+        """
+        Bring a debate back from the spill queue or the database
+        
+        Database errors propagate: an empty state in place of a stored debate
+        would restart it at round 1 and later be spilled over its rounds
+        """
+        state = self._spilling.get(debate_id)
+        if state is None and self.repository is not None:
+            state = await asyncio.to_thread(self.repository.load, debate_id)
+            if state is not None:
+                self.restores += 1
+        # Only a debate the repository does not know starts empty
+        return state or DebateState(debate_id=debate_id)
+    
+    async def exists(self, debate_id: str) -> bool:
+        # Unlike load(), an unknown id is not inserted into the LRU, so probing
+        # ids cannot evict live debates
+        if debate_id in self._states or debate_id in self._spilling:
+            return True
+        if self.repository is None:
+            return False
+        try:
+            return await asyncio.to_thread(self.repository.exists, debate_id)
+        except Exception as e:
+            logger.error(f"Failed to look up debate {debate_id}: {e}")
+            return False
+    
+    async def get_scores(self, debate_id: str) -> ScoreAggregate:
+        # A spilled debate's aggregate is read on its own; restoring the whole
+        # history into the LRU would evict a live debate for a scoreboard read
+        state = self._states.get(debate_id) or self._spilling.get(debate_id)
+        if state is not None:
+            return state.scores
+        if self.repository is None:
+            return ScoreAggregate()
+        scores = await asyncio.to_thread(self.repository.load_scores, debate_id)
+        return scores or ScoreAggregate()
+    
+    async def allocate_round(self, debate_id: str) -> int:
+        # Turns on one debate are serialized by the coordinator, so the
+        # provisional number is also the one append_round will assign
+        return len((await self.load(debate_id)).rounds) + 1
+    
+    async def append_round(self, debate_id: str, record: TurnRecord, topic: str = "") -> DebateState:
+        record = TurnRecord.coerce(record)
+        state = await self.load(debate_id)
+        record.renumber(len(state.rounds) + 1)
+        state.rounds.append(record)
+        state.scores.add_round(record)
+        if topic and not state.topic:
+            state.topic = topic
+        
+        record_bytes = estimate_record_bytes(record)
+        state.size_bytes += record_bytes
+        self._bytes += record_bytes
+        
+        await self._evict()
+        return state
+    
+    async def save_summary(self, debate_id: str, summary: str, summarized_through: int) -> None:
+        state = await self.load(debate_id)
+        state.summary = summary
+        state.summarized_through = summarized_through
+    
+    async def save_feedback(
+        self,
+        debate_id: str,
+        round_number: int,
+        feedback: Optional[str],
+        status: str
+    ) -> bool:
+        state = await self.load(debate_id)
+        # Feedback is usually for one of the latest rounds
+        for index in range(len(state.rounds) - 1, -1, -1):
+            record = state.rounds[index]
+            if record.round_number == round_number:
+                break
+        else:
+            return False
+        
+        before = estimate_record_bytes(record)
+        record.set_feedback(feedback, status)
+        delta = estimate_record_bytes(record) - before
+        state.size_bytes += delta
+        self._bytes += delta
+        
+        if index < state.persisted_rounds:
+            state.dirty_rounds.add(round_number)
+        return True
+    
+    async def _evict(self) -> None:
+        """Drop least recently used debates past the caps, spilling them to the database"""
+        evicted = []
+        while len(self._states) > 1 and (
+            len(self._states) > self.max_debates or self._bytes > self.max_bytes
+        ):
+            _, state = self._states.popitem(last=False)
+            self._bytes -= state.size_bytes
+            evicted.append(state)
+        
+        for state in evicted:
+            self.evictions += 1
+            await self._spill(state)
+    
+    async def _spill(self, state: DebateState) -> None:
+        if not state.rounds:
+            # Nothing worth persisting (e.g. a history lookup for an unknown debate)
+            return
+        if self.repository is None:
+            logger.warning(f"Evicted debate {state.debate_id} without persistence")
+            return
+        
+        self._spilling[state.debate_id] = state
+        try:
+            await asyncio.to_thread(self.repository.save, state)
+        except Exception as e:
+            self.spill_errors += 1
+            logger.error(f"Failed to spill debate {state.debate_id}: {e}")
+        finally:
+            if self._spilling.get(state.debate_id) is state:
+                del self._spilling[state.debate_id]
+    
+    async def close(self) -> None:
+        """Persist every resident debate on shutdown"""
+        if self.repository is None:
+            return
+        for state in list(self._states.values()):
+            await self._spill(state)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "resident_debates": len(self._states),
+            "max_debates": self.max_debates,
+            "resident_bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "restores": self.restores,
+            "spill_errors": self.spill_errors
+        }
+
+def create_debate_store() -> DebateStateStore:
+    """Build the state store selected by DEBATE_STATE_BACKEND"""
+    backend = settings.DEBATE_STATE_BACKEND.lower()
+    
+    if backend == "redis":
+        from app.services.redis_debate_store import RedisDebateStore
+        return RedisDebateStore(settings.REDIS_URL, ttl_seconds=settings.DEBATE_STATE_TTL)
+    
+    if backend == "memory":
+        return InMemoryDebateStore(
+            max_debates=settings.DEBATE_STATE_MAX_DEBATES,
+            max_bytes=settings.DEBATE_STATE_MAX_BYTES,
+            repository=DebateRepository() if settings.DEBATE_STATE_SPILL_TO_DB else None
+        )
+    
+    raise ValueError(f"Unsupported debate state backend: {settings.DEBATE_STATE_BACKEND}")
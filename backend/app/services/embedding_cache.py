@@ -0,0 +1,178 @@
+"""
+Embedding Cache
+Persistent, size-bounded cache of embedding vectors keyed by model and text hash
+"""
+
+from typing import Optional, List, Dict, Any, Tuple
+from array import array
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """
+    SQLite-backed embedding store that survives restarts
+    Vectors are stored as packed float32 blobs. Hits only note their recency
+    in memory; it is written back in one batch when enough hits pile up, a
+    while has passed, entries are about to be evicted, or the cache closes.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 100000,
+        touch_batch_size: int = 256,
+        touch_flush_seconds: float = 30.0
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_batch_size = touch_batch_size
+        self.touch_flush_seconds = touch_flush_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._touched: Dict[Tuple[str, str], float] = {}
+        self._last_touch_flush = time.monotonic()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "last_used REAL NOT NULL, PRIMARY KEY (model, text_hash))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._db.commit()
+        self._count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        
+        logger.info(f"Embedding cache opened at {path} with {self._count} entries")
+    
+    async def get(self, model: str, text_hash: str) -> Optional[List[float]]:
+        """Return the cached vector for (model, text_hash), if any"""
+        vector = await asyncio.to_thread(self._get, model, text_hash)
+        if vector is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return vector
+    
+    async def get_many(self, model: str, text_hashes: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for many hashes in a single round trip"""
+        found = await asyncio.to_thread(self._get_many, model, text_hashes)
+        self.hits += len(found)
+        self.misses += len(set(text_hashes)) - len(found)
+        return found
+    
+    async def set_many(self, model: str, items: Dict[str, List[float]]) -> None:
+        """Store many (text_hash -> vector) entries in a single transaction"""
+        items = {text_hash: vector for text_hash, vector in items.items() if vector}
+        if items:
+            await asyncio.to_thread(self._set_many, model, items)
+    
+    async def set(self, model: str, text_hash: str, vector: List[float]) -> None:
+        """Store a vector, evicting least recently used entries past the size bound"""
+        if vector:
+            await asyncio.to_thread(self._set, model, text_hash, vector)
+    
+    def _get(self, model: str, text_hash: str) -> Optional[List[float]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT vector FROM embeddings WHERE model = ? AND text_hash = ?",
+                (model, text_hash)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touch(model, [text_hash])
+        return array('f', row[0]).tolist()
+    
+    def _get_many(self, model: str, text_hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        unique = list(dict.fromkeys(text_hashes))
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    (model, *chunk)
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array('f', blob).tolist()
+            if found:
+                self._touch(model, list(found))
+        return found
+    
+    def _touch(self, model: str, text_hashes: List[str]) -> None:
+        """Note hits; the caller holds the lock"""
+        now = time.time()
+        for text_hash in text_hashes:
+            self._touched[(model, text_hash)] = now
+        if (
+            len(self._touched) >= self.touch_batch_size
+            or time.monotonic() - self._last_touch_flush >= self.touch_flush_seconds
+        ):
+            self._flush_touches()
+            self._db.commit()
+    
+    def _flush_touches(self) -> None:
+        """Write pending recency updates; the caller holds the lock and commits"""
+        if self._touched:
+            self._db.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(last_used, model, text_hash) for (model, text_hash), last_used in self._touched.items()]
+            )
+            self._touched.clear()
+        self._last_touch_flush = time.monotonic()
+    
+    def _set(self, model: str, text_hash: str, vector: List[float]) -> None:
+        self._set_many(model, {text_hash: vector})
+    
+    def _set_many(self, model: str, items: Dict[str, List[float]]) -> None:
+        now = time.time()
+        with self._lock:
+            for text_hash, vector in items.items():
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                    (model, text_hash, array('f', vector).tobytes(), now)
+                )
+                self._count += cursor.rowcount
+            
+            if self._count > self.max_entries:
+                # Recent hits must count before choosing what to evict
+                self._flush_touches()
+                # Evict in chunks of ~10% so inserts near the bound stay cheap
+                excess = self._count - self.max_entries + max(self.max_entries // 10, 1)
+                cursor = self._db.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                self._count -= cursor.rowcount
+                self.evictions += cursor.rowcount
+            self._db.commit()
+    
+    def close(self) -> None:
+        """Close the underlying store"""
+        with self._lock:
+            self._flush_touches()
+            self._db.commit()
+            self._db.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._count,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
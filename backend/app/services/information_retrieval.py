@@ -17,8 +17,9 @@ class InformationRetrieval:
     Vector-based information retrieval system
     """
     
-    def __init__(self):
-        self.llm_service = LLMService()
+    def __init__(self, llm_service: Optional[LLMService] = None):
+        # Share the caller's LLM service when given one
+        self.llm_service = llm_service or LLMService()
         
         # Initialize ChromaDB
         self.client = chromadb.Client(Settings(
@@ -36,22 +37,25 @@ class InformationRetrieval:
     
     async def add_documents(self, documents: List[Dict[str, Any]]) -> None:
         """Add documents to the vector store"""
+        if not documents:
+            return
+        
         try:
-            for doc in documents:
-                content = doc.get("content", "")
-                metadata = doc.get("metadata", {})
-                
-                # Generate embedding
-                embedding = await self.llm_service.embed(content)
-                
-                # Add to collection
-                self.collection.add(
-                    embeddings=[embedding],
-                    documents=[content],
-                    metadatas=[metadata],
-                    ids=[f"doc_{self.document_count}"]
-                )
-                self.document_count += 1
+            contents = [doc.get("content", "") for doc in documents]
+            metadatas = [doc.get("metadata", {}) for doc in documents]
+            
+            # Generate all embeddings in a handful of batched requests
+            embeddings = await self.llm_service.embed_many(contents)
+            
+            # Add to collection in one call
+            ids = [f"doc_{self.document_count + i}" for i in range(len(documents))]
+            self.collection.add(
+                embeddings=embeddings,
+                documents=contents,
+                metadatas=metadatas,
+                ids=ids
+            )
+            self.document_count += len(documents)
                 
             logger.info(f"Added {len(documents)} documents to vector store")
         except Exception as e:
@@ -3,10 +3,16 @@ LLM Service with Ollama Support
 Handles integration with Ollama (local), OpenAI, and Anthropic
 """
 
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
+import asyncio
 import httpx
 import json
 from app.config import settings
+from app.services.response_cache import ResponseCache
+from app.services.embedding_cache import EmbeddingCache
+from app.services.single_flight import SingleFlight
+from app.services.ollama_pool import OllamaLoadBalancer
+from app.utils.helpers import hash_text
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,92 +25,285 @@ class LLMService:
     def __init__(self):
         self.provider = settings.LLM_PROVIDER.lower()  # 'ollama', 'openai', 'anthropic'
         self.ollama_url = settings.OLLAMA_URL
+        
+        # Route Ollama traffic across every configured host
+        self.ollama_pool = OllamaLoadBalancer(
+            urls=settings.OLLAMA_URLS or [settings.OLLAMA_URL],
+            failure_threshold=settings.OLLAMA_FAILURE_THRESHOLD,
+            health_check_interval=settings.OLLAMA_HEALTH_CHECK_INTERVAL,
+            model_affinity=settings.OLLAMA_MODEL_AFFINITY
+        )
         self.model = settings.LLM_MODEL
+        self.embedding_model = settings.EMBEDDING_MODEL
+        
+        # Long-lived pooled HTTP client, created lazily on first use
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._active_requests = 0
+        self._peak_active_requests = 0
+        self._total_requests = 0
         
         logger.info(f"LLM Service initialized with provider: {self.provider}, model: {self.model}")
         
-        # Only import paid APIs if needed
+        # Only import paid APIs if needed (async clients, so calls never block the event loop)
         if self.provider == 'openai':
             import openai
-            self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+            self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         elif self.provider == 'anthropic':
-            from anthropic import Anthropic
-            self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+            from anthropic import AsyncAnthropic
+            self.client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
         else:
             self.client = None  # Ollama uses HTTP requests
+        
+        # Cap concurrent upstream calls for the configured provider
+        self.max_concurrency = {
+            'openai': settings.OPENAI_MAX_CONCURRENCY,
+            'anthropic': settings.ANTHROPIC_MAX_CONCURRENCY
+        }.get(self.provider, settings.OLLAMA_MAX_CONCURRENCY)
+        self._concurrency = asyncio.Semaphore(self.max_concurrency)
+        
+        # Content-addressed response cache
+        self.cache: Optional[ResponseCache] = None
+        if settings.LLM_CACHE_ENABLED:
+            self.cache = ResponseCache(
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.LLM_CACHE_TTL,
+                disk_path=settings.LLM_CACHE_DISK_PATH or None
+            )
+        
+        # Identical concurrent generation/embedding requests share one upstream call
+        self._flights = SingleFlight()
+        
+        # Persistent embedding cache keyed by (embedding model, sha256 of text)
+        self.embedding_cache: Optional[EmbeddingCache] = None
+        if settings.EMBEDDING_CACHE_ENABLED:
+            try:
+                self.embedding_cache = EmbeddingCache(
+                    path=settings.EMBEDDING_CACHE_PATH,
+                    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+                )
+            except Exception as e:
+                logger.warning(f"Embedding cache unavailable: {e}")
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating the connection pool if needed"""
+        if self._http_client is None or self._http_client.is_closed:
+            http2 = settings.LLM_HTTP2
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.warning("LLM_HTTP2 is enabled but 'h2' is not installed, using HTTP/1.1")
+                    http2 = False
+            
+            self._http_client = httpx.AsyncClient(
+                timeout=settings.LLM_HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY
+                ),
+                http2=http2
+            )
+        return self._http_client
+    
+    async def _post(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        timeout: Optional[float] = None
+    ) -> httpx.Response:
+        """POST to the least busy Ollama backend, tracking in-flight requests"""
+        client = self._get_http_client()
+        self._active_requests += 1
+        self._total_requests += 1
+        self._peak_active_requests = max(self._peak_active_requests, self._active_requests)
+        try:
+            async with self.ollama_pool.acquire(payload.get("model")) as backend:
+                response = await client.post(
+                    f"{backend.url}{path}",
+                    json=payload,
+                    timeout=timeout if timeout is not None else settings.LLM_HTTP_TIMEOUT
+                )
+                if response.status_code >= 500:
+                    self.ollama_pool.record_failure(backend)
+                else:
+                    self.ollama_pool.record_success(backend)
+                return response
+        finally:
+            self._active_requests -= 1
+    
+    async def start(self) -> None:
+        """Start background work (Ollama health checks), called on app startup"""
+        if self.provider == 'ollama':
+            self.ollama_pool.start(self._get_http_client())
+    
+    async def close(self) -> None:
+        """Close the pooled HTTP client (called on app shutdown)"""
+        await self.ollama_pool.stop()
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        self._http_client = None
+        
+        if self.cache is not None:
+            self.cache.close()
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
+            self.embedding_cache = None
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Report connection pool usage, for sizing the pool limits"""
+        stats = {
+            "max_connections": settings.LLM_HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.LLM_HTTP_MAX_KEEPALIVE,
+            "keepalive_expiry": settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+            "http2": settings.LLM_HTTP2,
+            "active_requests": self._active_requests,
+            "peak_active_requests": self._peak_active_requests,
+            "total_requests": self._total_requests,
+            "open_connections": 0,
+            "idle_connections": 0
+        }
+        
+        if self._http_client is None or self._http_client.is_closed:
+            return stats
+        
+        # httpx does not expose pool state publicly, so read it from httpcore defensively
+        pool = getattr(getattr(self._http_client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None) or []
+        stats["open_connections"] = len(connections)
+        stats["idle_connections"] = sum(
+            1 for conn in connections if getattr(conn, "is_idle", lambda: False)()
+        )
+        return stats
     
     async def generate(
         self, 
         prompt: str, 
         max_tokens: int = 500,
         temperature: float = 0.7,
-        system_prompt: Optional[str] = None
+        system_prompt: Optional[str] = None,
+        use_cache: bool = True,
+        json_mode: bool = False
     ) -> str:
         """
         Generate text using the configured LLM
+        
+        Identical requests are served from the response cache, and identical
+        concurrent requests share one upstream call, unless use_cache is False
+        (e.g. for high-temperature creative calls)
+        
+        json_mode asks providers that support it to return a single JSON object
         """
+        request_key = None
+        if use_cache:
+            request_key = ResponseCache.make_key(
+                self.provider, self.model, prompt, system_prompt, temperature, max_tokens,
+                json_mode=json_mode
+            )
+            if self.cache is not None:
+                cached = await self.cache.get(request_key)
+                if cached is not None:
+                    return cached
+        
         try:
+            if request_key is None:
+                return await self._generate_uncached(prompt, max_tokens, temperature, system_prompt, json_mode)
+            
+            return await self._flights.do(
+                f"generate:{request_key}",
+                lambda: self._generate_and_cache(
+                    request_key, prompt, max_tokens, temperature, system_prompt, json_mode
+                )
+            )
+        except httpx.TimeoutException:
+            logger.error("LLM request timed out")
+            return "Response generation timed out. Please try again."
+        except Exception as e:
+            logger.error(f"LLM generation error: {e}")
+            return "I apologize, but I'm having trouble generating a response right now."
+    
+    async def _generate_and_cache(
+        self,
+        request_key: str,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system_prompt: Optional[str],
+        json_mode: bool = False
+    ) -> str:
+        """Generate once and store the result; only successful generations are cached"""
+        result = await self._generate_uncached(prompt, max_tokens, temperature, system_prompt, json_mode)
+        if self.cache is not None:
+            await self.cache.set(request_key, result)
+        return result
+    
+    async def _generate_uncached(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system_prompt: Optional[str],
+        json_mode: bool = False
+    ) -> str:
+        """Dispatch to the configured provider, raising on failure"""
+        async with self._concurrency:
             if self.provider == 'ollama':
-                return await self._generate_ollama(prompt, max_tokens, temperature, system_prompt)
+                return await self._generate_ollama(prompt, max_tokens, temperature, system_prompt, json_mode)
             elif self.provider == 'openai':
-                return await self._generate_openai(prompt, max_tokens, temperature, system_prompt)
+                return await self._generate_openai(prompt, max_tokens, temperature, system_prompt, json_mode)
             elif self.provider == 'anthropic':
                 return await self._generate_anthropic(prompt, max_tokens, temperature, system_prompt)
             else:
                 return await self._generate_fallback(prompt)
-        except Exception as e:
-            logger.error(f"LLM generation error: {e}")
-            return "I apologize, but I'm having trouble generating a response right now."
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Return response cache hit/miss counters"""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.get_stats()}
     
     async def _generate_ollama(
         self, 
         prompt: str, 
         max_tokens: int,
         temperature: float,
-        system_prompt: Optional[str]
+        system_prompt: Optional[str],
+        json_mode: bool = False
     ) -> str:
         """Generate using Ollama (local, free!)"""
-        try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                payload = {
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": temperature,
-                        "num_predict": max_tokens
-                    }
-                }
-                
-                # Add system prompt if provided
-                if system_prompt:
-                    payload["system"] = system_prompt
-                
-                response = await client.post(
-                    f"{self.ollama_url}/api/generate",
-                    json=payload
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return result.get("response", "")
-                else:
-                    logger.error(f"Ollama error: {response.status_code} - {response.text}")
-                    return "Error generating response from Ollama."
-                    
-        except httpx.TimeoutException:
-            logger.error("Ollama request timed out")
-            return "Response generation timed out. Please try again."
-        except Exception as e:
-            logger.error(f"Ollama generation error: {e}")
-            return f"Error: {str(e)}"
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens
+            }
+        }
+        
+        # Add system prompt if provided
+        if system_prompt:
+            payload["system"] = system_prompt
+        
+        # Constrain output to valid JSON
+        if json_mode:
+            payload["format"] = "json"
+        
+        response = await self._post("/api/generate", payload)
+        
+        if response.status_code != 200:
+            raise RuntimeError(f"Ollama error: {response.status_code} - {response.text}")
+        
+        result = response.json()
+        return result.get("response", "")
     
     async def _generate_openai(
         self, 
         prompt: str, 
         max_tokens: int,
         temperature: float,
-        system_prompt: Optional[str]
+        system_prompt: Optional[str],
+        json_mode: bool = False
     ) -> str:
         """Generate using OpenAI GPT models"""
         messages = []
@@ -114,11 +313,13 @@ class LLMService:
         
         messages.append({"role": "user", "content": prompt})
         
-        response = self.client.chat.completions.create(
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+        response = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             max_tokens=max_tokens,
-            temperature=temperature
+            temperature=temperature,
+            **extra
         )
         
         return response.choices[0].message.content
@@ -131,7 +332,7 @@ class LLMService:
         system_prompt: Optional[str]
     ) -> str:
         """Generate using Anthropic Claude models"""
-        response = self.client.messages.create(
+        response = await self.client.messages.create(
             model=self.model,
             max_tokens=max_tokens,
             temperature=temperature,
@@ -141,37 +342,269 @@ class LLMService:
         
         return response.content[0].text
     
+    async def generate_stream(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        system_prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text token by token from the configured LLM
+        """
+        emitted = False
+        try:
+            if self.provider == 'ollama':
+                stream = self._stream_ollama(prompt, max_tokens, temperature, system_prompt)
+            elif self.provider == 'openai':
+                stream = self._stream_openai(prompt, max_tokens, temperature, system_prompt)
+            elif self.provider == 'anthropic':
+                stream = self._stream_anthropic(prompt, max_tokens, temperature, system_prompt)
+            else:
+                stream = self._stream_fallback(prompt)
+            
+            async with self._concurrency:
+                async for token in stream:
+                    if token:
+                        emitted = True
+                        yield token
+        except Exception as e:
+            logger.error(f"LLM streaming error: {e}")
+            if not emitted:
+                yield "I apologize, but I'm having trouble generating a response right now."
+    
+    async def _stream_ollama(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system_prompt: Optional[str]
+    ) -> AsyncIterator[str]:
+        """Stream tokens from Ollama's newline-delimited JSON response"""
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": True,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens
+            }
+        }
+        
+        if system_prompt:
+            payload["system"] = system_prompt
+        
+        client = self._get_http_client()
+        self._active_requests += 1
+        self._total_requests += 1
+        self._peak_active_requests = max(self._peak_active_requests, self._active_requests)
+        try:
+            async with self.ollama_pool.acquire(self.model) as backend:
+                async with client.stream("POST", f"{backend.url}/api/generate", json=payload) as response:
+                    if response.status_code != 200:
+                        if response.status_code >= 500:
+                            self.ollama_pool.record_failure(backend)
+                        body = await response.aread()
+                        raise RuntimeError(f"Ollama error: {response.status_code} - {body[:200]!r}")
+                    
+                    self.ollama_pool.record_success(backend)
+                    async for line in response.aiter_lines():
+                        if not line.strip():
+                            continue
+                        chunk = json.loads(line)
+                        yield chunk.get("response", "")
+                        if chunk.get("done"):
+                            break
+        finally:
+            self._active_requests -= 1
+    
+    async def _stream_openai(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system_prompt: Optional[str]
+    ) -> AsyncIterator[str]:
+        """Stream tokens from OpenAI chat completions"""
+        messages = []
+        
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        
+        messages.append({"role": "user", "content": prompt})
+        
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def _stream_anthropic(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system_prompt: Optional[str]
+    ) -> AsyncIterator[str]:
+        """Stream tokens from Anthropic messages"""
+        stream = await self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=system_prompt or "You are a skilled debater.",
+            messages=[{"role": "user", "content": prompt}],
+            stream=True
+        )
+        
+        async for event in stream:
+            if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                yield event.delta.text
+    
+    async def _stream_fallback(self, prompt: str) -> AsyncIterator[str]:
+        """Fallback streaming for testing without any LLM"""
+        response = await self._generate_fallback(prompt)
+        for word in response.split(" "):
+            yield word + " "
+    
     async def _generate_fallback(self, prompt: str) -> str:
         """Fallback generation for testing without any LLM"""
         return f"[Simulated response to: {prompt[:100]}...]"
     
     async def embed(self, text: str) -> List[float]:
-        """Generate embeddings for text"""
+        """Generate embeddings for text, served from the embedding cache when possible"""
+        text_hash = hash_text(text)
+        if self.embedding_cache is not None:
+            cached = await self.embedding_cache.get(self.embedding_model, text_hash)
+            if cached is not None:
+                return cached
+        
         try:
-            if self.provider == 'ollama':
-                # Use Ollama's embedding endpoint
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(
-                        f"{self.ollama_url}/api/embeddings",
-                        json={
-                            "model": "nomic-embed-text",  # Ollama embedding model
-                            "prompt": text
-                        }
-                    )
-                    if response.status_code == 200:
-                        result = response.json()
-                        return result.get("embedding", [])
-                    
-            elif self.provider == 'openai':
-                response = self.client.embeddings.create(
-                    model=settings.EMBEDDING_MODEL,
-                    input=text
-                )
-                return response.data[0].embedding
-            
-            # Fallback: simple hash-based embedding
-            return [float(hash(text[i:i+10]) % 1000) / 1000 for i in range(0, min(len(text), 1000), 10)]
-            
+            embedding = await self._flights.do(
+                f"embed:{self.embedding_model}:{text_hash}",
+                lambda: self._embed_and_cache(text, text_hash)
+            )
         except Exception as e:
             logger.error(f"Embedding error: {e}")
             return [0.0] * 768  # Return zero vector (smaller for Ollama)
+        
+        if embedding is None:
+            # Fallback: simple hash-based embedding (process-local, so never cached)
+            return [float(hash(text[i:i+10]) % 1000) / 1000 for i in range(0, min(len(text), 1000), 10)]
+        
+        return embedding
+    
+    async def _embed_and_cache(self, text: str, text_hash: str) -> Optional[List[float]]:
+        """Embed once and store the vector in the embedding cache"""
+        embedding = await self._embed_uncached(text)
+        if embedding is not None and self.embedding_cache is not None:
+            await self.embedding_cache.set(self.embedding_model, text_hash, embedding)
+        return embedding
+    
+    async def _embed_uncached(self, text: str) -> Optional[List[float]]:
+        """Embed with the configured provider, or None when it has no embedding"""
+        # A one-item batch goes to the same endpoint as embed_many, so both paths
+        # produce (and cache under the same key) identical, normalized vectors
+        embeddings = await self._embed_batch_uncached([text])
+        return embeddings[0] if embeddings else None
+    
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for many texts using provider-native batching
+        
+        Cached vectors are reused, duplicate texts are embedded once, and the
+        remainder is sent in EMBEDDING_BATCH_SIZE batches with at most
+        EMBEDDING_BATCH_CONCURRENCY batches in flight
+        """
+        if not texts:
+            return []
+        
+        hashes = [hash_text(text) for text in texts]
+        vectors: Dict[str, List[float]] = {}
+        if self.embedding_cache is not None:
+            vectors = await self.embedding_cache.get_many(self.embedding_model, hashes)
+        
+        # Unique texts that still need embedding, in first-seen order
+        pending: Dict[str, str] = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in vectors and text_hash not in pending:
+                pending[text_hash] = text
+        
+        if pending:
+            pending_hashes = list(pending)
+            batch_size = max(settings.EMBEDDING_BATCH_SIZE, 1)
+            batches = [
+                pending_hashes[i:i + batch_size]
+                for i in range(0, len(pending_hashes), batch_size)
+            ]
+            limiter = asyncio.Semaphore(max(settings.EMBEDDING_BATCH_CONCURRENCY, 1))
+            
+            async def run_batch(batch_hashes: List[str]) -> Dict[str, List[float]]:
+                batch_texts = [pending[h] for h in batch_hashes]
+                async with limiter:
+                    try:
+                        embeddings = await self._embed_batch_uncached(batch_texts)
+                    except Exception as e:
+                        logger.error(f"Batch embedding error: {e}")
+                        embeddings = None
+                
+                if embeddings is None or len(embeddings) != len(batch_texts):
+                    # Provider has no batch support (or it failed): embed one by one
+                    embeddings = [await self.embed(text) for text in batch_texts]
+                    return dict(zip(batch_hashes, embeddings))
+                
+                batch_vectors = dict(zip(batch_hashes, embeddings))
+                if self.embedding_cache is not None:
+                    await self.embedding_cache.set_many(self.embedding_model, batch_vectors)
+                return batch_vectors
+            
+            for batch_vectors in await asyncio.gather(*[run_batch(b) for b in batches]):
+                vectors.update(batch_vectors)
+        
+        return [vectors[text_hash] for text_hash in hashes]
+    
+    async def _embed_batch_uncached(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """Embed a batch in one provider request, or None when batching is unsupported"""
+        if self.provider == 'ollama':
+            # /api/embed accepts a list input and returns one vector per item
+            async with self._concurrency:
+                response = await self._post(
+                    "/api/embed",
+                    {
+                        "model": self.embedding_model,
+                        "input": texts
+                    },
+                    timeout=30.0 + len(texts)
+                )
+            if response.status_code == 200:
+                return response.json().get("embeddings") or None
+            logger.error(f"Ollama embedding error: {response.status_code} - {response.text}")
+        
+        elif self.provider == 'openai':
+            async with self._concurrency:
+                response = await self.client.embeddings.create(
+                    model=self.embedding_model,
+                    input=texts
+                )
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        
+        return None
+    
+    def get_backend_stats(self) -> Dict[str, Any]:
+        """Return per-backend Ollama routing and health state"""
+        return self.ollama_pool.get_stats()
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """Return how many generation/embedding calls were coalesced"""
+        return self._flights.get_stats()
+    
+    def get_embedding_cache_stats(self) -> Dict[str, Any]:
+        """Return embedding cache counters"""
+        if self.embedding_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.embedding_cache.get_stats()}
@@ -0,0 +1,168 @@
+"""
+Ollama Load Balancer
+Routes requests across several Ollama hosts by least outstanding requests,
+with periodic health checks and optional model affinity
+"""
+
+from typing import Optional, Dict, Any, List, Set, AsyncIterator
+from contextlib import asynccontextmanager
+import asyncio
+import time
+import httpx
+import logging
+
+logger = logging.getLogger(__name__)
+
+class OllamaBackend:
+    """
+    State for a single Ollama endpoint
+    """
+    
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.healthy = True
+        self.outstanding = 0
+        self.total_requests = 0
+        self.total_failures = 0
+        self.consecutive_failures = 0
+        self.models: Set[str] = set()
+        self.last_checked: Optional[float] = None
+    
+    def serves(self, model: str) -> bool:
+        """Whether the last health check reported this model as available"""
+        return model in self.models or model.split(":")[0] in self.models
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures,
+            "consecutive_failures": self.consecutive_failures,
+            "models": sorted(self.models),
+            "last_checked": self.last_checked
+        }
+
+class OllamaLoadBalancer:
+    """
+    Least-outstanding-requests router over a set of Ollama backends
+    """
+    
+    def __init__(
+        self,
+        urls: List[str],
+        failure_threshold: int = 3,
+        health_check_interval: float = 15.0,
+        model_affinity: Optional[Dict[str, List[str]]] = None
+    ):
+        if not urls:
+            raise ValueError("At least one Ollama URL is required")
+        
+        self.backends = [OllamaBackend(url) for url in dict.fromkeys(urls)]
+        self.failure_threshold = failure_threshold
+        self.health_check_interval = health_check_interval
+        self.model_affinity = {
+            model: {url.rstrip("/") for url in model_urls}
+            for model, model_urls in (model_affinity or {}).items()
+        }
+        self._health_task: Optional[asyncio.Task] = None
+    
+    def select(self, model: Optional[str] = None) -> OllamaBackend:
+        """Pick the healthy backend with the fewest outstanding requests"""
+        candidates = [backend for backend in self.backends if backend.healthy]
+        if not candidates:
+            # Every node is ejected: try them all rather than failing outright
+            candidates = list(self.backends)
+        
+        if model:
+            pinned = self.model_affinity.get(model)
+            if pinned:
+                preferred = [backend for backend in candidates if backend.url in pinned]
+            else:
+                preferred = [backend for backend in candidates if backend.serves(model)]
+            if preferred:
+                candidates = preferred
+        
+        return min(candidates, key=lambda backend: (backend.outstanding, backend.total_requests))
+    
+    @asynccontextmanager
+    async def acquire(self, model: Optional[str] = None) -> AsyncIterator[OllamaBackend]:
+        """Reserve a backend for one request, recording the outcome"""
+        backend = self.select(model)
+        backend.outstanding += 1
+        backend.total_requests += 1
+        try:
+            yield backend
+        except (httpx.TransportError, httpx.TimeoutException):
+            self.record_failure(backend)
+            raise
+        finally:
+            backend.outstanding -= 1
+    
+    def record_success(self, backend: OllamaBackend) -> None:
+        backend.consecutive_failures = 0
+    
+    def record_failure(self, backend: OllamaBackend) -> None:
+        """Count a failed request, ejecting the node past the failure threshold"""
+        backend.total_failures += 1
+        backend.consecutive_failures += 1
+        if backend.healthy and backend.consecutive_failures >= self.failure_threshold:
+            backend.healthy = False
+            logger.warning(f"Ejected Ollama backend {backend.url} after {backend.consecutive_failures} failures")
+    
+    async def check_health(self, client: httpx.AsyncClient) -> None:
+        """Probe every backend's /api/tags, ejecting or re-admitting nodes"""
+        await asyncio.gather(*[self._check_backend(client, backend) for backend in self.backends])
+    
+    async def _check_backend(self, client: httpx.AsyncClient, backend: OllamaBackend) -> None:
+        backend.last_checked = time.time()
+        try:
+            response = await client.get(f"{backend.url}/api/tags", timeout=5.0)
+            response.raise_for_status()
+            backend.models = {
+                name
+                for item in response.json().get("models", [])
+                for name in (item.get("name", ""), item.get("name", "").split(":")[0])
+                if name
+            }
+        except Exception as e:
+            if backend.healthy:
+                logger.warning(f"Ollama backend {backend.url} failed health check: {e}")
+            backend.healthy = False
+            return
+        
+        if not backend.healthy:
+            logger.info(f"Re-admitted Ollama backend {backend.url}")
+        backend.healthy = True
+        backend.consecutive_failures = 0
+    
+    def start(self, client: httpx.AsyncClient) -> None:
+        """Start periodic health checks in the background"""
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop(client))
+    
+    async def stop(self) -> None:
+        """Stop periodic health checks"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+    
+    async def _health_loop(self, client: httpx.AsyncClient) -> None:
+        while True:
+            try:
+                await self.check_health(client)
+            except Exception as e:
+                logger.error(f"Ollama health check error: {e}")
+            await asyncio.sleep(self.health_check_interval)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-backend routing and health state"""
+        return {
+            "backends": [backend.to_dict() for backend in self.backends],
+            "healthy": sum(1 for backend in self.backends if backend.healthy)
+        }
@@ -0,0 +1,252 @@
+"""
+Persuasiveness Model
+A small ridge regression over text features, trained on rounds the LLM has
+already scored, that replaces the per-argument persuasiveness LLM call when
+PERSUASIVENESS_SCORER="local".
+
+The model file is plain JSON (feature names, standardization and weights),
+and scoring is a dot product in pure Python; NumPy is only needed to train.
+
+    python -m app.services.persuasiveness_model train [--output PATH] [--alpha 1.0]
+    python -m app.services.persuasiveness_model evaluate [--model PATH]
+"""
+
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+import argparse
+import json
+import math
+import os
+import random
+import re
+import time
+from app.agents.text_features import analyze_text
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+MODEL_VERSION = 1
+
+FEATURE_NAMES: Tuple[str, ...] = (
+    "log_words",
+    "log_sentences",
+    "avg_sentence_length",
+    "avg_word_length",
+    "lexical_diversity",
+    "logical_connectors",
+    "contrast",
+    "evidence_terms",
+    "citation",
+    "numbers",
+    "questions",
+    "exclamations",
+    "topic_overlap"
+)
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+
+# A sample is (argument, topic, LLM persuasiveness score)
+Sample = Tuple[str, str, float]
+
+def extract_features(argument: str, topic: str) -> List[float]:
+    """Feature vector for one argument, in FEATURE_NAMES order"""
+    text = analyze_text(argument)
+    words = max(text.word_count, 1)
+    topic_words = set(topic.lower().split())
+    
+    return [
+        math.log1p(text.word_count),
+        math.log1p(text.sentence_count),
+        text.avg_sentence_length,
+        len(argument) / words,
+        len(text.words) / words,
+        float(text.count("logical_connectors")),
+        float(text.count("contrast")),
+        float(text.count("evidence")),
+        1.0 if text.has_citation else 0.0,
+        float(len(_NUMBER.findall(argument))),
+        float(argument.count("?")),
+        float(argument.count("!")),
+        len(topic_words & text.words) / max(len(topic_words), 1)
+    ]
+
+@dataclass
+class PersuasivenessModel:
+    """Standardized linear model: score = intercept + sum(coef * (x - mean) / scale)"""
+    coef: List[float]
+    mean: List[float]
+    scale: List[float]
+    intercept: float
+    alpha: float = 1.0
+    features: List[str] = field(default_factory=lambda: list(FEATURE_NAMES))
+    version: int = MODEL_VERSION
+    trained_at: str = ""
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    
+    def predict(self, argument: str, topic: str = "") -> float:
+        """Persuasiveness on the LLM's 0-10 scale"""
+        score = self.intercept
+        for x, mean, scale, coef in zip(extract_features(argument, topic), self.mean, self.scale, self.coef):
+            score += coef * (x - mean) / scale
+        return min(max(score, 0.0), 10.0)
+    
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(asdict(self), f, indent=1)
+    
+    @classmethod
+    def load(cls, path: str) -> "PersuasivenessModel":
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != MODEL_VERSION or data.get("features") != list(FEATURE_NAMES):
+            raise ValueError(f"{path} was trained with different features; retrain it")
+        return cls(**data)
+
+def load_configured_model() -> Optional[PersuasivenessModel]:
+    """Model selected by settings, or None to keep LLM scoring"""
+    if settings.PERSUASIVENESS_SCORER.lower() != "local":
+        return None
+    try:
+        return PersuasivenessModel.load(settings.PERSUASIVENESS_MODEL_PATH)
+    except (OSError, ValueError, TypeError) as e:
+        logger.error(f"Local persuasiveness model unavailable, using the LLM: {e}")
+        return None
+
+def fit(samples: Sequence[Sample], alpha: float = 1.0) -> PersuasivenessModel:
+    """Closed-form ridge regression on standardized features"""
+    import numpy as np
+    
+    X = np.array([extract_features(argument, topic) for argument, topic, _ in samples])
+    y = np.array([score for _, _, score in samples], dtype=np.float64)
+    
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    Z = (X - mean) / scale
+    intercept = y.mean()
+    
+    coef = np.linalg.solve(Z.T @ Z + alpha * np.eye(Z.shape[1]), Z.T @ (y - intercept))
+    
+    return PersuasivenessModel(
+        coef=coef.tolist(),
+        mean=mean.tolist(),
+        scale=scale.tolist(),
+        intercept=float(intercept),
+        alpha=alpha,
+        trained_at=datetime.utcnow().isoformat()
+    )
+
+def evaluate(model: PersuasivenessModel, samples: Sequence[Sample], baseline: Optional[float] = None) -> Dict[str, Any]:
+    """Agreement with the LLM scores: MAE, Pearson r, share within 1 point, latency"""
+    import numpy as np
+    
+    if not samples:
+        return {"samples": 0}
+    
+    started = time.perf_counter()
+    predicted = np.array([model.predict(argument, topic) for argument, topic, _ in samples])
+    elapsed = time.perf_counter() - started
+    actual = np.array([score for _, _, score in samples])
+    errors = np.abs(predicted - actual)
+    
+    pearson = None
+    if predicted.std() > 0 and actual.std() > 0:
+        pearson = round(float(np.corrcoef(predicted, actual)[0, 1]), 4)
+    
+    metrics = {
+        "samples": len(samples),
+        "mae": round(float(errors.mean()), 4),
+        "pearson": pearson,
+        "within_1": round(float((errors <= 1.0).mean()), 4),
+        "predict_us": round(elapsed / len(samples) * 1e6, 1)
+    }
+    if baseline is not None:
+        # What always answering the training mean would score
+        metrics["baseline_mae"] = round(float(np.abs(actual - baseline).mean()), 4)
+    return metrics
+
+def train(
+    samples: Sequence[Sample],
+    alpha: float = 1.0,
+    holdout: float = 0.2,
+    seed: int = 13
+) -> PersuasivenessModel:
+    """Measure agreement on a held-out split, then fit the final model on everything"""
+    shuffled = list(samples)
+    random.Random(seed).shuffle(shuffled)
+    split = int(len(shuffled) * (1 - holdout))
+    train_set, test_set = shuffled[:split], shuffled[split:]
+    
+    metrics: Dict[str, Any] = {}
+    if test_set and train_set:
+        candidate = fit(train_set, alpha)
+        metrics = evaluate(candidate, test_set, baseline=candidate.intercept)
+    
+    model = fit(shuffled, alpha)
+    model.metrics = {"holdout": metrics, "train_samples": len(shuffled)}
+    return model
+
+def load_samples(include_local: bool = False, drop_default: bool = False) -> List[Sample]:
+    """
+    Collect LLM-scored arguments from stored rounds
+    
+    Rounds scored by the local model are skipped unless include_local, so the
+    model never trains on its own output. drop_default drops 5.0 scores,
+    which include the LLM path's parse-failure fallback.
+    """
+    from app.models.database import get_session
+    from app.models.debate import Debate, DebateRound
+    
+    samples: List[Sample] = []
+    with get_session() as session:
+        rows = (
+            session.query(DebateRound.human_argument, DebateRound.ai_argument, DebateRound.evaluation_data, Debate.topic)
+            .outerjoin(Debate, Debate.id == DebateRound.debate_id)
+            .yield_per(1000)
+        )
+        for human_argument, ai_argument, evaluation, topic in rows:
+            evaluation = evaluation or {}
+            if evaluation.get("persuasiveness_scorer") == "local" and not include_local:
+                continue
+            for argument, side in ((human_argument, "human"), (ai_argument, "ai")):
+                score = (evaluation.get(f"{side}_scores") or {}).get("persuasiveness")
+                if not argument or not isinstance(score, (int, float)):
+                    continue
+                if drop_default and score == 5.0:
+                    continue
+                samples.append((argument, topic or "", float(score)))
+    return samples
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train or evaluate the local persuasiveness model")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    train_parser = commands.add_parser("train", help="fit a model on LLM-scored rounds")
+    train_parser.add_argument("--output", default=settings.PERSUASIVENESS_MODEL_PATH)
+    train_parser.add_argument("--alpha", type=float, default=1.0, help="ridge penalty")
+    train_parser.add_argument("--holdout", type=float, default=0.2, help="share of samples held out for metrics")
+    train_parser.add_argument("--min-samples", type=int, default=200)
+    train_parser.add_argument("--drop-default", action="store_true", help="ignore 5.0 scores (LLM parse fallback)")
+    
+    evaluate_parser = commands.add_parser("evaluate", help="measure a model against the stored LLM scores")
+    evaluate_parser.add_argument("--model", default=settings.PERSUASIVENESS_MODEL_PATH)
+    evaluate_parser.add_argument("--drop-default", action="store_true", help="ignore 5.0 scores (LLM parse fallback)")
+    
+    args = parser.parse_args(argv)
+    samples = load_samples(drop_default=args.drop_default)
+    
+    if args.command == "train":
+        if len(samples) < args.min_samples:
+            raise SystemExit(f"Only {len(samples)} LLM-scored arguments stored; need {args.min_samples}")
+        model = train(samples, alpha=args.alpha, holdout=args.holdout)
+        model.save(args.output)
+        print(json.dumps({"output": args.output, **model.metrics}))
+    else:
+        model = PersuasivenessModel.load(args.model)
+        print(json.dumps({"model": args.model, **evaluate(model, samples, baseline=model.intercept)}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Redis Debate State Store
+Shares debate history between uvicorn workers and pods.
+Each debate uses two keys, both refreshed to the same TTL on every write:
+a list of compact JSON turn records (RPUSH) and a hash with the topic,
+rolling summary and running score aggregate.
+"""
+
+from typing import Dict, Any, Optional
+import json
+import redis.asyncio as aioredis
+from redis.exceptions import WatchError
+from app.services.debate_store import DebateState, DebateStateStore, TurnRecord
+from app.services.score_aggregate import ScoreAggregate
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RedisDebateStore(DebateStateStore):
+    """
+    Debate state kept in Redis
+    
+    A round's number is fixed in the same transaction that appends it (one
+    past the stored rounds), so two workers handling the same debate never
+    store the same round and turns that fail leave no gaps
+    """
+    
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        ttl_seconds: int = 7 * 24 * 3600,
+        key_prefix: str = "debate",
+        client: Optional[aioredis.Redis] = None,
+        max_write_retries: int = 10
+    ):
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self.max_write_retries = max_write_retries
+        self._owns_client = client is None
+        self.redis = client or aioredis.from_url(url, decode_responses=True)
+    
+    def _keys(self, debate_id: str) -> Dict[str, str]:
+        base = f"{self.key_prefix}:{debate_id}"
+        return {
+            "rounds": f"{base}:rounds",
+            "meta": f"{base}:meta"
+        }
+    
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> str:
+        return json.dumps(record, separators=(",", ":"), default=str)
+    
+    @staticmethod
+    def _decode_scores(raw: Optional[str]) -> ScoreAggregate:
+        return ScoreAggregate.from_dict(json.loads(raw)) if raw else ScoreAggregate()
+    
+    async def load(self, debate_id: str) -> DebateState:
+        keys = self._keys(debate_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.lrange(keys["rounds"], 0, -1)
+            pipe.hgetall(keys["meta"])
+            raw_rounds, meta = await pipe.execute()
+        
+        rounds = [TurnRecord.from_json(raw) for raw in raw_rounds]
+        # Lists written before rounds were numbered on append may be out of order
+        rounds.sort(key=lambda record: record.round_number)
+        
+        return DebateState(
+            debate_id=debate_id,
+            rounds=rounds,
+            topic=meta.get("topic", ""),
+            summary=meta.get("summary", ""),
+            summarized_through=int(meta.get("summarized_through", 0)),
+            persisted_rounds=len(rounds),
+            size_bytes=sum(len(raw) for raw in raw_rounds),
+            scores=self._decode_scores(meta.get("scores"))
+        )
+    
+    async def allocate_round(self, debate_id: str) -> int:
+        # Provisional: a concurrent turn on another worker may take this number first
+        return await self.redis.llen(self._keys(debate_id)["rounds"]) + 1
+    
+    async def append_round(self, debate_id: str, record: TurnRecord, topic: str = "") -> DebateState:
+        record = TurnRecord.coerce(record)
+        keys = self._keys(debate_id)
+        
+        # The record, its final round number and the updated score aggregate are
+        # written together; retry if another worker appended in between
+        for _ in range(self.max_write_retries):
+            async with self.redis.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(keys["rounds"], keys["meta"])
+                    record.renumber(await pipe.llen(keys["rounds"]) + 1)
+                    scores = self._decode_scores(await pipe.hget(keys["meta"], "scores"))
+                    scores.add_round(record)
+                    
+                    pipe.multi()
+                    pipe.rpush(keys["rounds"], record.to_json())
+                    pipe.hset(keys["meta"], "scores", self._encode(scores.to_dict()))
+                    if topic:
+                        pipe.hsetnx(keys["meta"], "topic", topic)
+                    for key in keys.values():
+                        pipe.expire(key, self.ttl_seconds)
+                    await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+        else:
+            raise RuntimeError(f"Could not append round to debate {debate_id}: too much contention")
+        
+        return await self.load(debate_id)
+    
+    async def exists(self, debate_id: str) -> bool:
+        keys = self._keys(debate_id)
+        return await self.redis.exists(keys["rounds"], keys["meta"]) > 0
+    
+    async def get_scores(self, debate_id: str) -> ScoreAggregate:
+        # Read just the aggregate, not the full history
+        return self._decode_scores(await self.redis.hget(self._keys(debate_id)["meta"], "scores"))
+    
+    async def save_summary(self, debate_id: str, summary: str, summarized_through: int) -> None:
+        meta_key = self._keys(debate_id)["meta"]
+        for _ in range(self.max_write_retries):
+            async with self.redis.pipeline(transaction=True) as pipe:
+                try:
+                    # Never overwrite a newer summary written by another worker
+                    await pipe.watch(meta_key)
+                    current = int(await pipe.hget(meta_key, "summarized_through") or 0)
+                    if summarized_through <= current:
+                        await pipe.unwatch()
+                        return
+                    
+                    pipe.multi()
+                    pipe.hset(meta_key, mapping={
+                        "summary": summary,
+                        "summarized_through": summarized_through
+                    })
+                    pipe.expire(meta_key, self.ttl_seconds)
+                    await pipe.execute()
+                    return
+                except WatchError:
+                    continue
+        logger.warning(f"Gave up saving the summary for {debate_id} after repeated conflicts")
+    
+    async def save_feedback(
+        self,
+        debate_id: str,
+        round_number: int,
+        feedback: Optional[str],
+        status: str
+    ) -> bool:
+        keys = self._keys(debate_id)
+        for _ in range(self.max_write_retries):
+            async with self.redis.pipeline(transaction=True) as pipe:
+                try:
+                    # Rewrite the round's list entry in place; retry if a round is appended meanwhile
+                    await pipe.watch(keys["rounds"])
+                    raw_rounds = await pipe.lrange(keys["rounds"], 0, -1)
+                    for index in range(len(raw_rounds) - 1, -1, -1):
+                        record = TurnRecord.from_json(raw_rounds[index])
+                        if record.round_number == round_number:
+                            break
+                    else:
+                        await pipe.unwatch()
+                        return False
+                    
+                    record.set_feedback(feedback, status)
+                    pipe.multi()
+                    pipe.lset(keys["rounds"], index, record.to_json())
+                    pipe.expire(keys["rounds"], self.ttl_seconds)
+                    await pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+        logger.warning(f"Gave up saving feedback for {debate_id} round {round_number} after repeated conflicts")
+        return False
+    
+    async def close(self) -> None:
+        if self._owns_client:
+            await self.redis.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis",
+            "ttl_seconds": self.ttl_seconds,
+            "key_prefix": self.key_prefix
+        }
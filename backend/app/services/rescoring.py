@@ -0,0 +1,281 @@
+"""
+Batch Rescoring
+Recomputes the non-LLM criteria of stored debate rounds after the heuristic
+weights change. Features are extracted once per argument, the criteria are
+scored for whole shards at once with NumPy, shards of debates run across a
+process pool, and each shard is written back with bulk UPDATEs.
+
+Persuasiveness comes from the LLM and is kept as stored; totals, winners,
+the rounded score columns and each debate's score aggregate are rebuilt.
+
+    python -m app.services.rescoring --workers 8 --shard-size 500 [--dry-run]
+"""
+
+from typing import Dict, Any, List, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import numpy as np
+from app.agents.evaluation_agent import HeuristicWeights
+from app.agents.text_features import analyze_text
+from app.services.score_aggregate import ScoreAggregate
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The stored rounds are mostly unique texts; skip the per-turn LRU cache
+_analyze = analyze_text.__wrapped__
+
+# Score used when a stored round has no persuasiveness (the agent's own fallback)
+DEFAULT_PERSUASIVENESS = 5.0
+
+def extract_features(arguments: Sequence[str], topics: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Lexicon counts and sentence statistics for many arguments, as arrays"""
+    n = len(arguments)
+    features = {
+        "connectors": np.zeros(n, dtype=np.int16),
+        "contrast": np.zeros(n, dtype=np.int16),
+        "evidence": np.zeros(n, dtype=np.int16),
+        "citation": np.zeros(n, dtype=bool),
+        "avg_sentence_length": np.zeros(n, dtype=np.float64),
+        "sentence_count": np.zeros(n, dtype=np.int32),
+        "topic_overlap": np.zeros(n, dtype=np.int32)
+    }
+    topic_words: Dict[str, frozenset] = {}
+    
+    for i, (argument, topic) in enumerate(zip(arguments, topics)):
+        text = _analyze(argument or "")
+        words = topic_words.get(topic)
+        if words is None:
+            words = topic_words[topic] = frozenset((topic or "").lower().split())
+        
+        features["connectors"][i] = text.count("logical_connectors")
+        features["contrast"][i] = text.count("contrast")
+        features["evidence"][i] = text.count("evidence")
+        features["citation"][i] = text.has_citation
+        features["avg_sentence_length"][i] = text.avg_sentence_length
+        features["sentence_count"][i] = text.sentence_count
+        features["topic_overlap"][i] = len(words & text.words)
+    
+    return features
+
+def score_features(features: Dict[str, np.ndarray], weights: HeuristicWeights) -> Dict[str, np.ndarray]:
+    """
+    Vectorized EvaluationAgent heuristics
+    
+    Same arithmetic, in the same order, as the per-argument methods, so the
+    results match them exactly
+    """
+    cap = weights.max_score
+    
+    coherence = (
+        weights.coherence_base
+        + features["connectors"] * weights.connector_weight
+        + np.minimum(features["contrast"] * weights.contrast_weight, weights.contrast_cap)
+    )
+    
+    evidence = weights.evidence_base + features["evidence"] * weights.evidence_term_weight
+    evidence = np.where(features["citation"], evidence + weights.citation_bonus, evidence)
+    
+    avg = features["avg_sentence_length"]
+    clarity = np.full(avg.shape, weights.clarity_base)
+    ideal = (avg >= weights.ideal_sentence_min) & (avg <= weights.ideal_sentence_max)
+    clarity = np.where(ideal, clarity + weights.ideal_sentence_bonus, clarity)
+    clarity = np.where(~ideal & (avg > weights.long_sentence_threshold), clarity - weights.long_sentence_penalty, clarity)
+    clarity = np.where(features["sentence_count"] >= weights.structure_min_sentences, clarity + weights.structure_bonus, clarity)
+    
+    relevance = weights.relevance_base + features["topic_overlap"] * weights.topic_overlap_weight
+    
+    return {
+        "logical_coherence": np.minimum(coherence, cap),
+        "evidence_quality": np.minimum(evidence, cap),
+        "clarity": np.minimum(clarity, cap),
+        "relevance": np.minimum(relevance, cap)
+    }
+
+def _persuasiveness(evaluation: Dict[str, Any], participant: str) -> float:
+    value = (evaluation.get(f"{participant}_scores") or {}).get("persuasiveness")
+    return float(value) if isinstance(value, (int, float)) else DEFAULT_PERSUASIVENESS
+
+def rescore_rounds(
+    rounds: List[Dict[str, Any]],
+    topics: Dict[str, str],
+    weights: HeuristicWeights
+) -> List[Dict[str, Any]]:
+    """
+    Rescore stored rounds
+    
+    rounds are dicts with id, debate_id, human_argument, ai_argument and
+    evaluation_data; returns one bulk-update dict per round
+    """
+    if not rounds:
+        return []
+    
+    n = len(rounds)
+    arguments = [r["human_argument"] for r in rounds] + [r["ai_argument"] for r in rounds]
+    argument_topics = [topics.get(r["debate_id"], "") for r in rounds] * 2
+    
+    criteria = score_features(extract_features(arguments, argument_topics), weights)
+    evaluations = [r["evaluation_data"] or {} for r in rounds]
+    criteria["persuasiveness"] = np.array(
+        [_persuasiveness(e, "human") for e in evaluations] + [_persuasiveness(e, "ai") for e in evaluations]
+    )
+    
+    # Same criterion order as EvaluationAgent.criteria, so totals match to the bit
+    order = ["logical_coherence", "evidence_quality", "persuasiveness", "clarity", "relevance"]
+    total = sum(criteria[name] for name in order) / len(order)
+    human_total, ai_total = total[:n], total[n:]
+    
+    margin = weights.winner_margin
+    winners = np.where(
+        human_total > ai_total + margin, "human",
+        np.where(ai_total > human_total + margin, "ai", "tie")
+    ).tolist()
+    
+    columns = {name: criteria[name].tolist() for name in order}
+    totals = total.tolist()
+    
+    updates = []
+    for i, (record, evaluation) in enumerate(zip(rounds, evaluations)):
+        scores = {}
+        for side, offset in (("human", 0), ("ai", n)):
+            side_scores = {name: columns[name][i + offset] for name in order}
+            side_scores["total"] = totals[i + offset]
+            scores[side] = side_scores
+        
+        updates.append({
+            "id": record["id"],
+            "human_score": round(scores["human"]["total"]),
+            "ai_score": round(scores["ai"]["total"]),
+            "round_winner": winners[i],
+            "evaluation_data": {
+                **evaluation,
+                "human_scores": scores["human"],
+                "ai_scores": scores["ai"],
+                "round_winner": winners[i]
+            }
+        })
+    return updates
+
+def rescore_debates(
+    debate_ids: List[str],
+    weights: HeuristicWeights,
+    dry_run: bool = False
+) -> Dict[str, int]:
+    """Rescore every round of the given debates in one transaction (one shard)"""
+    from sqlalchemy import update
+    from app.models.database import get_session
+    from app.models.debate import Debate, DebateRound
+    
+    with get_session() as session:
+        debates = {
+            row.id: row
+            for row in session.query(Debate.id, Debate.topic, Debate.debate_metadata)
+            .filter(Debate.id.in_(debate_ids))
+        }
+        rounds = [
+            row._asdict()
+            for row in session.query(
+                DebateRound.id,
+                DebateRound.debate_id,
+                DebateRound.round_number,
+                DebateRound.human_argument,
+                DebateRound.ai_argument,
+                DebateRound.round_winner,
+                DebateRound.evaluation_data
+            )
+            .filter(DebateRound.debate_id.in_(debate_ids))
+            .order_by(DebateRound.debate_id, DebateRound.round_number)
+        ]
+        
+        updates = rescore_rounds(rounds, {debate_id: row.topic for debate_id, row in debates.items()}, weights)
+        changed = sum(1 for record, new in zip(rounds, updates) if record["round_winner"] != new["round_winner"])
+        
+        if not dry_run and updates:
+            session.execute(update(DebateRound), updates)
+            
+            # Rebuild each debate's running scoreboard from the rescored rounds
+            by_debate: Dict[str, List[Dict[str, Any]]] = {}
+            for record, new in zip(rounds, updates):
+                by_debate.setdefault(record["debate_id"], []).append({
+                    "round_number": record["round_number"],
+                    "evaluation": new["evaluation_data"]
+                })
+            session.execute(update(Debate), [
+                {
+                    "id": debate_id,
+                    "debate_metadata": {
+                        **(debates[debate_id].debate_metadata or {}),
+                        "scores": ScoreAggregate.from_rounds(debate_rounds).to_dict()
+                    }
+                }
+                for debate_id, debate_rounds in by_debate.items()
+                if debate_id in debates
+            ])
+            session.commit()
+    
+    return {"debates": len(debate_ids), "rounds": len(updates), "winners_changed": changed}
+
+def rescore_all(
+    weights: Optional[HeuristicWeights] = None,
+    workers: int = 1,
+    shard_size: int = 500,
+    dry_run: bool = False
+) -> Dict[str, int]:
+    """Rescore every stored round, sharded by debate across a process pool"""
+    from app.models.database import get_session
+    from app.models.debate import DebateRound
+    
+    weights = weights or HeuristicWeights.from_settings()
+    with get_session() as session:
+        debate_ids = [
+            row[0] for row in session.query(DebateRound.debate_id).distinct().order_by(DebateRound.debate_id)
+        ]
+    shards = [debate_ids[i:i + shard_size] for i in range(0, len(debate_ids), max(shard_size, 1))]
+    
+    totals = {"debates": 0, "rounds": 0, "winners_changed": 0}
+    started = time.perf_counter()
+    
+    def collect(result: Dict[str, int]) -> None:
+        for key in totals:
+            totals[key] += result[key]
+        logger.info(f"Rescored {totals['rounds']} rounds in {totals['debates']}/{len(debate_ids)} debates")
+    
+    if workers <= 1 or len(shards) <= 1:
+        for shard in shards:
+            collect(rescore_debates(shard, weights, dry_run))
+    else:
+        # Spawned workers open their own database engine instead of inheriting ours
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [executor.submit(rescore_debates, shard, weights, dry_run) for shard in shards]
+            for future in futures:
+                collect(future.result())
+    
+    totals["seconds"] = round(time.perf_counter() - started, 2)
+    return totals
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rescore stored debate rounds with the current heuristic weights")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--shard-size", type=int, default=500, help="debates per shard (one transaction each)")
+    parser.add_argument("--weights", help="JSON file of HeuristicWeights overrides")
+    parser.add_argument("--dry-run", action="store_true", help="score without writing")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    
+    weights = HeuristicWeights.from_settings()
+    if args.weights:
+        with open(args.weights) as f:
+            weights = replace(weights, **json.load(f))
+    
+    result = rescore_all(weights, workers=args.workers, shard_size=args.shard_size, dry_run=args.dry_run)
+    print(json.dumps({**result, "dry_run": args.dry_run}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+LLM Response Cache
+Content-addressed cache for LLM generations with an in-memory LRU/TTL tier
+and an optional SQLite disk tier
+"""
+
+from typing import Optional, Dict, Any
+from collections import OrderedDict
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from app.utils.helpers import hash_text
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """
+    Two-tier cache of generated text keyed by a hash of the request
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        disk_path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        
+        # Optional persistent tier
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if disk_path:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM llm_responses WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+    
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool = False
+    ) -> str:
+        """Build the content address for a generation request"""
+        parts = [provider, model, prompt, system_prompt, temperature, max_tokens]
+        if json_mode:
+            # Only JSON-mode requests get the extra part, so existing keys stay valid
+            parts.append("json")
+        return hash_text(json.dumps(parts, ensure_ascii=False))
+    
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a cached response, checking memory then disk"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        
+        if self._db is not None:
+            value = await asyncio.to_thread(self._disk_get, key)
+            if value is not None:
+                self._remember(key, value)
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+        
+        self.misses += 1
+        return None
+    
+    async def set(self, key: str, value: str) -> None:
+        """Store a response in both tiers"""
+        self._remember(key, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, value)
+    
+    def _remember(self, key: str, value: str) -> None:
+        """Insert into the in-memory LRU, evicting the least recently used entry"""
+        self._entries[key] = (time.time() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _disk_get(self, key: str) -> Optional[str]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value FROM llm_responses WHERE key = ? AND expires_at >= ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+    
+    def _disk_set(self, key: str, value: str) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl_seconds)
+            )
+            self._db.commit()
+    
+    def clear(self) -> None:
+        """Drop all cached responses"""
+        self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM llm_responses")
+                self._db.commit()
+    
+    def close(self) -> None:
+        """Close the disk tier"""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "disk_enabled": self._db is not None
+        }
@@ -0,0 +1,106 @@
+"""
+Score Aggregate
+Running per-debate scoreboard, updated in O(1) as rounds are appended
+"""
+
+from typing import Dict, Any, Optional, List
+from dataclasses import dataclass, field, asdict
+
+PARTICIPANTS = ("human", "ai")
+
+def _per_participant() -> Dict[str, Any]:
+    return {participant: 0.0 for participant in PARTICIPANTS}
+
+@dataclass
+class ScoreAggregate:
+    """Totals, per-criterion sums, outcomes and streaks for one debate"""
+    rounds: int = 0
+    totals: Dict[str, float] = field(default_factory=_per_participant)
+    criteria_totals: Dict[str, Dict[str, float]] = field(
+        default_factory=lambda: {participant: {} for participant in PARTICIPANTS}
+    )
+    outcomes: Dict[str, int] = field(default_factory=lambda: {"human": 0, "ai": 0, "tie": 0})
+    streak_holder: Optional[str] = None  # side that won the most recent consecutive rounds
+    streak_length: int = 0
+    longest_streaks: Dict[str, int] = field(default_factory=lambda: {"human": 0, "ai": 0})
+    last_round: int = 0
+    
+    def add_round(self, record: Dict[str, Any]) -> None:
+        """Fold one turn record into the aggregate"""
+        evaluation = record.get("evaluation") or {}
+        self.rounds += 1
+        self.last_round = max(self.last_round, record.get("round_number") or self.rounds)
+        
+        for participant in PARTICIPANTS:
+            scores = evaluation.get(f"{participant}_scores") or {}
+            self.totals[participant] += scores.get("total", 0)
+            criteria = self.criteria_totals.setdefault(participant, {})
+            for criterion, value in scores.items():
+                if criterion != "total":
+                    criteria[criterion] = criteria.get(criterion, 0.0) + value
+        
+        winner = evaluation.get("round_winner")
+        if winner not in self.outcomes:
+            return
+        self.outcomes[winner] += 1
+        
+        # A tie breaks any winning streak
+        if winner == "tie":
+            self.streak_holder, self.streak_length = None, 0
+        elif winner == self.streak_holder:
+            self.streak_length += 1
+        else:
+            self.streak_holder, self.streak_length = winner, 1
+        
+        if self.streak_holder:
+            self.longest_streaks[winner] = max(self.longest_streaks[winner], self.streak_length)
+    
+    @classmethod
+    def from_rounds(cls, rounds: List[Dict[str, Any]]) -> "ScoreAggregate":
+        """Rebuild the aggregate from full history (restoring old records)"""
+        aggregate = cls()
+        for record in rounds:
+            aggregate.add_round(record)
+        return aggregate
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScoreAggregate":
+        return cls(**data)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+    
+    def cumulative_scores(self) -> Dict[str, Any]:
+        """Running totals in the shape returned with every turn"""
+        return {
+            "human_total": self.totals["human"],
+            "ai_total": self.totals["ai"],
+            "rounds": self.rounds,
+            "human_average": self.totals["human"] / self.rounds if self.rounds else 0,
+            "ai_average": self.totals["ai"] / self.rounds if self.rounds else 0
+        }
+    
+    def scoreboard(self) -> Dict[str, Any]:
+        """Full live scoreboard"""
+        leader = "tie"
+        if self.totals["human"] > self.totals["ai"]:
+            leader = "human"
+        elif self.totals["ai"] > self.totals["human"]:
+            leader = "ai"
+        
+        return {
+            **self.cumulative_scores(),
+            "criteria_averages": {
+                participant: {
+                    criterion: total / self.rounds
+                    for criterion, total in criteria.items()
+                } if self.rounds else {}
+                for participant, criteria in self.criteria_totals.items()
+            },
+            "wins": {"human": self.outcomes["human"], "ai": self.outcomes["ai"]},
+            "ties": self.outcomes["tie"],
+            "current_streak": {"holder": self.streak_holder, "length": self.streak_length},
+            "longest_streaks": dict(self.longest_streaks),
+            "leader": leader,
+            "last_round": self.last_round
+        }
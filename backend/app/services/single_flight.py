@@ -0,0 +1,59 @@
+"""
+Single-Flight Request Coalescing
+Concurrent callers with the same key share one upstream call
+"""
+
+from typing import Dict, Any, Callable, Awaitable, TypeVar
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    In-flight deduplication of identical async calls
+    """
+    
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn() for key, or join the call already in flight for key
+        
+        The upstream call is shielded, so one caller being cancelled does
+        not cancel it for the others waiting on the same key
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.coalesced += 1
+            logger.debug(f"Coalesced request {key[:12]}")
+        
+        return await asyncio.shield(task)
+    
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        """Drop a finished call so later requests go upstream again"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter went away
+            task.exception()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return coalescing counters"""
+        total = self.calls + self.coalesced
+        return {
+            "upstream_calls": self.calls,
+            "coalesced_calls": self.coalesced,
+            "in_flight": len(self._in_flight),
+            "coalesced_ratio": self.coalesced / total if total else 0.0
+        }
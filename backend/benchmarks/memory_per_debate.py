@@ -0,0 +1,135 @@
+"""
+Memory per debate: plain dicts/dataclasses vs compact slotted records
+
+Builds the same synthetic debates twice - once with the old turn dicts and
+non-slotted AgentMessage, once with TurnRecord and the slotted AgentMessage -
+and reports traced bytes per debate.
+
+Run from backend/:
+    python -m benchmarks.memory_per_debate --debates 2000 --rounds 6
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Any, List
+import argparse
+import gc
+import random
+import tracemalloc
+
+from app.agents.base_agent import AgentMessage
+from app.services.debate_store import TurnRecord
+
+AGENTS = ["keyword_extractor", "argument_generator", "counter_argument", "evaluation_agent"]
+WORDS = (
+    "renewable energy subsidies reduce emissions costs grid storage policy research "
+    "evidence market jobs investment carbon nuclear solar wind efficiency"
+).split()
+
+@dataclass
+class LegacyAgentMessage:
+    """AgentMessage as it was before slots and interning"""
+    sender: str
+    receiver: str
+    message_type: str
+    content: Dict[str, Any]
+    timestamp: datetime
+    correlation_id: str
+
+def _fresh(text: str) -> str:
+    # Build a new string object each time, as JSON parsing and LLM output do
+    return "".join(list(text))
+
+def _argument(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(90))
+
+def _evaluation(rng: random.Random) -> Dict[str, Any]:
+    def scores():
+        values = {
+            _fresh(name): rng.uniform(4, 9)
+            for name in ["logical_coherence", "evidence_quality", "persuasiveness", "clarity", "relevance"]
+        }
+        values[_fresh("total")] = sum(values.values()) / 5
+        return values
+
+    return {
+        _fresh("human_scores"): scores(),
+        _fresh("ai_scores"): scores(),
+        _fresh("feedback"): _argument(rng)[:300],
+        _fresh("round_winner"): _fresh(rng.choice(["human", "ai", "tie"])),
+        _fresh("agent"): _fresh("evaluation_agent")
+    }
+
+def build_debates(compact: bool, debates: int, rounds: int, seed: int = 7) -> List[Any]:
+    rng = random.Random(seed)
+    message_cls = AgentMessage if compact else LegacyAgentMessage
+    kept = []
+
+    for _ in range(debates):
+        history = []
+        for round_number in range(1, rounds + 1):
+            human, ai = _argument(rng), _argument(rng)
+            keywords = [_fresh(rng.choice(WORDS)) for _ in range(10)]
+            evaluation = _evaluation(rng)
+            timestamp = datetime.now().isoformat()
+
+            if compact:
+                history.append(TurnRecord(
+                    round_number=round_number,
+                    human_argument=human,
+                    ai_argument=ai,
+                    keywords=tuple(keywords),
+                    evaluation=evaluation,
+                    timestamp=timestamp
+                ))
+            else:
+                history.append({
+                    "round_number": round_number,
+                    "human_argument": human,
+                    "ai_argument": ai,
+                    "keywords": keywords,
+                    "evaluation": evaluation,
+                    "timestamp": timestamp
+                })
+
+            # One request/response pair per agent, as the coordinator sends them
+            for agent_id in AGENTS:
+                for sender, receiver in [("coordinator", agent_id), (agent_id, "coordinator")]:
+                    history.append(message_cls(
+                        sender=_fresh(sender),
+                        receiver=_fresh(receiver),
+                        message_type=_fresh("process_request"),
+                        content={},
+                        timestamp=datetime.now(),
+                        correlation_id="corr"
+                    ))
+        kept.append(history)
+
+    return kept
+
+def measure(compact: bool, debates: int, rounds: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    data = build_debates(compact, debates, rounds)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    return (after - before) // debates
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--debates", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=6)
+    args = parser.parse_args()
+
+    legacy = measure(False, args.debates, args.rounds)
+    compact = measure(True, args.debates, args.rounds)
+
+    print(f"debates={args.debates} rounds={args.rounds}")
+    print(f"legacy dict/dataclass : {legacy:>8} bytes per debate")
+    print(f"compact slotted       : {compact:>8} bytes per debate")
+    print(f"saved                 : {legacy - compact:>8} bytes per debate ({(legacy - compact) / legacy:.1%})")
+
+if __name__ == "__main__":
+    main()
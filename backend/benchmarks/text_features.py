@@ -0,0 +1,146 @@
+"""
+Lexical heuristics: per-heuristic rescans vs one shared text-analysis pass
+
+Runs the evaluation, argument-structure and strategy heuristics over the
+same synthetic arguments twice - once as they were written (every check
+lower-cases and rescans the text), once reading the shared TextFeatures -
+checks that both give identical results and reports the time per argument.
+
+Run from backend/:
+    python -m benchmarks.text_features --words 2000 --arguments 200
+"""
+
+from typing import Dict, Any, List
+import argparse
+import random
+import time
+
+from app.agents.argument_generator import ArgumentGeneratorAgent
+from app.agents.counter_argument import CounterArgumentAgent
+from app.agents.evaluation_agent import EvaluationAgent
+from app.agents.text_features import analyze_text
+
+WORDS = (
+    "renewable energy subsidies reduce emissions because research shows costs falling. "
+    "However grid storage remains expensive, although data from the survey (IEA 2023) "
+    "suggests therefore that policy should act. Consequently the findings and statistics "
+    "support investment while critics allege a fallacy in the reasoning. According to the "
+    "Study, the Evidence is Mixed"
+).split()
+
+TOPIC = "Renewable energy subsidies"
+
+def _argument(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def legacy_heuristics(argument: str, topic: str) -> Dict[str, Any]:
+    """The heuristics as they were before the shared pass"""
+    logical = 5.0
+    logical_words = ['therefore', 'thus', 'hence', 'because', 'since', 'consequently']
+    logical += sum(1 for word in logical_words if word in argument.lower()) * 0.5
+    contradiction_words = ['but', 'however', 'although']
+    logical += min(sum(1 for word in contradiction_words if word in argument.lower()) * 0.3, 1.5)
+
+    evidence = 3.0
+    evidence_words = ['research', 'study', 'data', 'evidence', 'statistics', 'findings', 'survey']
+    evidence += sum(1 for word in evidence_words if word in argument.lower()) * 0.8
+    if any(marker in argument for marker in ['(', 'according to', 'states that']):
+        evidence += 2.0
+
+    clarity = 5.0
+    sentences = [s for s in argument.split('.') if s.strip()]
+    avg_sentence_length = sum(len(s.split()) for s in sentences) / max(len(sentences), 1)
+    if 15 <= avg_sentence_length <= 25:
+        clarity += 2.0
+    elif avg_sentence_length > 35:
+        clarity -= 1.0
+    if len(sentences) >= 3:
+        clarity += 1.0
+
+    overlap = len(set(topic.lower().split()) & set(argument.lower().split()))
+    relevance = 5.0 + overlap * 0.5
+
+    structure_sentences = [s.strip() for s in argument.split('.') if s.strip()]
+    structure = {
+        "sentence_count": len(structure_sentences),
+        "word_count": len(argument.split()),
+        "has_evidence": any(word in argument.lower() for word in ['research', 'study', 'data', 'evidence']),
+        "has_reasoning": any(word in argument.lower() for word in ['because', 'therefore', 'thus', 'hence'])
+    }
+
+    counter_lower = argument.lower()
+    strategies = []
+    if any(word in counter_lower for word in ['however', 'although', 'while']):
+        strategies.append("concession_refutation")
+    if any(word in counter_lower for word in ['evidence', 'research', 'data']):
+        strategies.append("evidence_based")
+    if any(word in counter_lower for word in ['logic', 'reasoning', 'fallacy']):
+        strategies.append("logical_analysis")
+
+    return {
+        "scores": [min(logical, 10.0), min(evidence, 10.0), min(clarity, 10.0), min(relevance, 10.0)],
+        "structure": structure,
+        "strategy": ", ".join(strategies) if strategies else "direct_rebuttal"
+    }
+
+def shared_heuristics(
+    evaluator: EvaluationAgent,
+    generator: ArgumentGeneratorAgent,
+    counter: CounterArgumentAgent,
+    argument: str,
+    topic: str
+) -> Dict[str, Any]:
+    """The same heuristics through the agents, reading one TextFeatures"""
+    return {
+        "scores": [
+            evaluator._score_logical_coherence(argument),
+            evaluator._score_evidence(argument),
+            evaluator._score_clarity(argument),
+            evaluator._score_relevance(argument, topic)
+        ],
+        "structure": generator._analyze_argument_structure(argument),
+        "strategy": counter._determine_strategy(argument)
+    }
+
+def _time(fn, arguments: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for argument in arguments:
+            fn(argument)
+        best = min(best, time.perf_counter() - start)
+    return best / len(arguments)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", type=int, default=2000, help="words per argument")
+    parser.add_argument("--arguments", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    arguments = [_argument(rng, args.words) for _ in range(args.arguments)]
+
+    # The agents only need an LLM for their async work
+    evaluator = EvaluationAgent(llm_service=None)
+    generator = ArgumentGeneratorAgent(llm_service=None, ir_service=None)
+    counter = CounterArgumentAgent(llm_service=None)
+
+    def shared(argument: str) -> Dict[str, Any]:
+        # Time the analysis itself, not the cache
+        analyze_text.cache_clear()
+        return shared_heuristics(evaluator, generator, counter, argument, TOPIC)
+
+    for argument in arguments:
+        assert shared(argument) == legacy_heuristics(argument, TOPIC), "heuristics diverged"
+
+    legacy = _time(lambda argument: legacy_heuristics(argument, TOPIC), arguments, args.repeat)
+    single = _time(shared, arguments, args.repeat)
+
+    print(f"arguments={args.arguments} words={args.words} ({sum(map(len, arguments)) // len(arguments)} chars)")
+    print(f"per-heuristic rescans : {legacy * 1e6:>9.1f} us per argument")
+    print(f"shared single pass    : {single * 1e6:>9.1f} us per argument")
+    print(f"speedup               : {legacy / single:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
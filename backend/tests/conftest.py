@@ -0,0 +1,13 @@
+import pytest
+from app.config import settings
+
+@pytest.fixture(autouse=True, scope="session")
+def isolated_data_paths(tmp_path_factory):
+    """Keep files the services create during tests out of the working tree"""
+    data_dir = tmp_path_factory.mktemp("data")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "EMBEDDING_CACHE_PATH", str(data_dir / "embedding_cache.db"))
+        patch.setattr(settings, "VECTOR_STORE_PATH", str(data_dir / "vector_store"))
+        # The API tests reach the real DebateRepository through the app's store
+        patch.setattr(settings, "DATABASE_URL", f"sqlite:///{data_dir / 'debate_system.db'}")
+        yield data_dir
@@ -77,3 +77,114 @@ async def test_invalid_topic():
         json={"topic": ""}
     )
     assert response.status_code == 400
+
+def test_shared_coordinator():
+    """Routes share one coordinator instead of building one per request"""
+    from app.api.dependencies import get_coordinator, get_llm_service
+    
+    coordinator = get_coordinator()
+    assert coordinator is get_coordinator()
+    assert coordinator.llm_service is get_llm_service()
+    assert coordinator.ir_service.llm_service is coordinator.llm_service
+
+def test_unknown_debate_is_404():
+    """Scoreboard and history report unknown debates without caching them"""
+    from app.api.dependencies import get_coordinator
+    
+    store = get_coordinator().state_store
+    resident = store.get_stats()["resident_debates"]
+    
+    assert client.get("/api/v1/debate/scoreboard/unknown-debate").status_code == 404
+    assert client.get("/api/v1/debate/history/unknown-debate").status_code == 404
+    assert store.get_stats()["resident_debates"] == resident
+
+def test_overloaded_agent_returns_503():
+    """A full agent queue is reported as 503 with Retry-After"""
+    from app.api.dependencies import get_coordinator
+    from app.agents.message_bus import BusOverloadedError
+    
+    class OverloadedCoordinator:
+        async def process_debate_turn(self, **kwargs):
+            raise BusOverloadedError("counter_argument", 200)
+    
+    app.dependency_overrides[get_coordinator] = lambda: OverloadedCoordinator()
+    try:
+        response = client.post(
+            "/api/v1/debate/argument",
+            json={"debate_id": "debate-1", "argument": "This is my test argument", "round_number": 1}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+def test_batch_streams_ndjson():
+    """Batch endpoint streams one JSON line per item"""
+    import json
+    from app.api.dependencies import get_coordinator
+    
+    class BatchCoordinator:
+        async def process_batch(self, items, concurrency):
+            for index, item in reversed(list(enumerate(items))):
+                yield {"index": index, "debate_id": item["debate_id"], "status": "ok", "result": {}}
+    
+    app.dependency_overrides[get_coordinator] = lambda: BatchCoordinator()
+    try:
+        response = client.post(
+            "/api/v1/debate/batch",
+            json={"items": [
+                {"debate_id": "debate-1", "argument": "First test argument"},
+                {"debate_id": "debate-2", "argument": "Second test argument"}
+            ]}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [1, 0]
+
+def test_batch_charges_rate_limit_per_item():
+    """A batch cannot submit more turns for a debate than its limit allows, and a rejected batch costs nothing"""
+    from app.api.dependencies import get_coordinator, get_rate_limiter
+    from app.security.rate_limiter import RateLimiter
+    
+    class BatchCoordinator:
+        async def process_batch(self, items, concurrency):
+            for index, item in enumerate(items):
+                yield {"index": index, "debate_id": item["debate_id"], "status": "ok", "result": {}}
+    
+    def submit(debate_ids):
+        return client.post(
+            "/api/v1/debate/batch",
+            json={"items": [
+                {"debate_id": debate_id, "argument": f"Test argument number {i}"}
+                for i, debate_id in enumerate(debate_ids)
+            ]}
+        )
+    
+    limiter = RateLimiter(max_requests=2, window_seconds=60)
+    app.dependency_overrides[get_coordinator] = lambda: BatchCoordinator()
+    app.dependency_overrides[get_rate_limiter] = lambda: limiter
+    try:
+        too_many = submit(["debate-1"] * 3)
+        # debate-1 fits, debate-2 does not: neither is charged
+        second_over = submit(["debate-1", "debate-2", "debate-2", "debate-2"])
+        remaining = {debate_id: limiter.get_remaining(debate_id) for debate_id in ("debate-1", "debate-2")}
+        admitted = submit(["debate-1", "debate-2"])
+    finally:
+        app.dependency_overrides.clear()
+    
+    assert too_many.status_code == 429
+    assert second_over.status_code == 429
+    assert "debate-2" in second_over.json()["detail"]
+    assert remaining == {"debate-1": 2, "debate-2": 2}
+    assert admitted.status_code == 200
+    assert limiter.get_remaining("debate-1") == 1
+
+def test_feedback_for_unknown_round_is_404():
+    """Feedback endpoint reports rounds that were never played"""
+    response = client.get("/api/v1/debate/feedback/unknown-debate/1")
+    assert response.status_code == 404
@@ -54,4 +54,16 @@ async def test_rate_limiter():
         assert await limiter.check_rate_limit("test_user")
     
     # 6th request should fail
-    assert not await limiter.check_rate_limit("test_user")
\ No newline at end of file
+    assert not await limiter.check_rate_limit("test_user")
+
+@pytest.mark.asyncio
+async def test_rate_limiter_charges_cost():
+    limiter = RateLimiter(max_requests=5, window_seconds=10)
+    
+    assert await limiter.check_rate_limit("test_user", cost=3)
+    assert limiter.get_remaining("test_user") == 2
+    
+    # A request that does not fit is rejected without using up the allowance
+    assert not await limiter.check_rate_limit("test_user", cost=3)
+    assert limiter.get_remaining("test_user") == 2
+    assert await limiter.check_rate_limit("test_user", cost=2)
\ No newline at end of file